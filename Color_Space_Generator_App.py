@@ -1,22 +1,2149 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+import time
+# 进程开始导入本模块的时间，用于测量启动耗时
+IMPORT_STARTED = time.perf_counter()
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog
+except ImportError:  # 没有安装 Tk 时仍可使用命令行模式
+    tk = None
+import os
+import io
+import sys
+import argparse
 import csv
 import json
 import sqlite3
 import math
-import colorsys
-from colormath.color_objects import sRGBColor, LabColor, CMYKColor, HSVColor
-from colormath.color_conversions import convert_color
+import itertools
+import importlib
+import functools
+import hashlib
+import threading
+import queue
+import collections
+import contextlib
 from datetime import datetime
+from decimal import Decimal
+
+
+class LazyModule:
+    # 第一次访问属性时才真正导入模块；numpy 和 colormath 导入较慢，
+    # 延迟到实际生成时再加载可以明显缩短界面的启动时间
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+np = LazyModule("numpy")
+color_objects = LazyModule("colormath.color_objects")
+color_conversions = LazyModule("colormath.color_conversions")
+# 性能分析模块只在开启分析时才用到
+cProfile = LazyModule("cProfile")
+pstats = LazyModule("pstats")
+tracemalloc = LazyModule("tracemalloc")
+# 进程池只在多进程生成时才用到（导入 concurrent.futures.process 会连带加载 multiprocessing 和 logging）
+futures = LazyModule("concurrent.futures")
+multiprocessing = LazyModule("multiprocessing")
+
+# 每批处理的网格点数量
+CHUNK_SIZE = 1000000
+# 界面轮询进度队列的间隔（毫秒），以及工作线程发送进度的最小间隔（秒）
+POLL_INTERVAL_MS = 100
+PROGRESS_INTERVAL = 0.1
+
+
+def step_decimals(step):
+    # 步长的小数位数，例如 0.01 -> 2、0.25 -> 2
+    return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+
+def axis_count(v_min, v_max, step):
+    # 区间 [v_min, v_max] 内从 v_min 开始、间隔为 step 的取值个数（区间不必是步长的整数倍）
+    if v_max < v_min:
+        return 0
+    if isinstance(step, int) and isinstance(v_min, int) and isinstance(v_max, int):
+        return (v_max - v_min) // step + 1
+    # 浮点步长：容许微小的舍入误差，例如 (1 - 0) / 0.1 = 9.999999999999998
+    return int(math.floor((v_max - v_min) / step + 1e-9)) + 1
+
+
+class ColorGrid:
+    # 多维网格的解析表示：不需要枚举就能得到点数、第 n 个点的坐标和坐标对应的下标
+    # 各通道取值为 v_min + i * step（浮点步长时按步长和起始值中较多的小数位数舍入），最后一维变化最快
+    def __init__(self, ranges, step, float_values=False):
+        self.starts = [v_min for v_min, v_max in ranges]
+        self.step = step
+        self.float_values = float_values
+        # 每个维度舍入的小数位数，起始值的小数位数比步长多时（如 0.125 起、步长 0.05）不能丢掉
+        self.decimals = [max(step_decimals(step), step_decimals(v_min)) for v_min, v_max in ranges] if float_values else None
+        self.shape = tuple(axis_count(v_min, v_max, step) for v_min, v_max in ranges)
+        self.size = math.prod(self.shape)
+        # 每个维度的下标增加 1 时线性下标增加多少
+        self.strides = tuple(math.prod(self.shape[dim + 1:]) for dim in range(len(self.shape)))
+    
+    def __len__(self):
+        return self.size
+    
+    def value(self, dim, i):
+        # 第 dim 维第 i 个取值，i 可以是整数或数组
+        value = self.starts[dim] + i * self.step
+        if self.float_values:
+            decimals = self.decimals[dim]
+            return np.round(value, decimals) if isinstance(value, np.ndarray) else round(value, decimals)
+        return value
+    
+    def unravel(self, index):
+        # 线性下标 -> 各维下标
+        if not 0 <= index < self.size:
+            raise IndexError("颜色下标超出范围")
+        return tuple((index // stride) % count for stride, count in zip(self.strides, self.shape))
+    
+    def coords_at(self, index):
+        # 第 index 个点的坐标
+        return tuple(self.value(dim, i) for dim, i in enumerate(self.unravel(index)))
+    
+    def index_of(self, coords):
+        # 坐标 -> 线性下标；坐标不在网格上时抛出 ValueError
+        if len(coords) != len(self.shape):
+            raise ValueError(f"需要 {len(self.shape)} 个坐标")
+        index = 0
+        for dim, value in enumerate(coords):
+            i = round((value - self.starts[dim]) / self.step)
+            if not 0 <= i < self.shape[dim] or abs(self.value(dim, i) - value) > 1e-9:
+                raise ValueError(f"坐标不在网格上: {tuple(coords)}")
+            index += i * self.strides[dim]
+        return index
+    
+    def slice(self, start, stop):
+        # 线性下标 [start, stop) 的所有点，每个维度返回一个数组
+        indices = np.unravel_index(np.arange(start, stop), self.shape)
+        return tuple(self.value(dim, i) for dim, i in enumerate(indices))
+
+
+@functools.lru_cache(maxsize=None)
+def hex_byte_table():
+    # 0-255 每个字节对应的两位大写十六进制字符（UCS4 码位，可直接视为 numpy 字符串）
+    return np.array([[ord(ch) for ch in f"{i:02X}"] for i in range(256)], dtype=np.uint32)
+
+
+def split_rgb(values):
+    # 用移位和掩码从 24 位整数中取出 R/G/B 通道
+    return (values >> 16) & 0xFF, (values >> 8) & 0xFF, values & 0xFF
+
+
+# 24 位 RGB 的颜色总数
+RGB_CUBE_SIZE = 1 << 24
+
+
+def pack_rgb(r, g, b):
+    # 将 R/G/B 打包为 24 位整数，超出 0-255 的值先截断
+    r, g, b = (np.clip(channel, 0, 255).astype(np.int64) for channel in (r, g, b))
+    return (r << 16) | (g << 8) | b
+
+
+def rgb_to_hex_array(r, g, b, prefix="#"):
+    # 通过查表整块拼接 HEX 字符串，返回字符串列表
+    r, g, b = np.asarray(r), np.asarray(g), np.asarray(b)
+    width = len(prefix) + 6
+    buffer = np.empty((len(r), width), dtype=np.uint32)
+    buffer[:, :len(prefix)] = [ord(ch) for ch in prefix]
+    for offset, channel in zip((0, 2, 4), (r, g, b)):
+        start = len(prefix) + offset
+        buffer[:, start:start + 2] = hex_byte_table()[np.clip(channel, 0, 255)]
+    hex_values = buffer.view(f"U{width}").ravel().tolist()
+    # 超出 0-255 的值（如 Lab 色域外）保持原来的格式化结果
+    out_of_range = (r < 0) | (r > 255) | (g < 0) | (g > 255) | (b < 0) | (b > 255)
+    for i in np.flatnonzero(out_of_range).tolist():
+        hex_values[i] = f"{prefix}{int(r[i]):02X}{int(g[i]):02X}{int(b[i]):02X}"
+    return hex_values
+
+
+def to_rgb255(r, g, b):
+    # 0-1 浮点通道四舍五入为 0-255 整数，舍入方式与内置 round() 相同
+    return tuple(np.rint(x * 255).astype(np.int64) for x in (r, g, b))
+
+
+# colorsys 使用的常量
+ONE_THIRD = 1.0 / 3.0
+ONE_SIXTH = 1.0 / 6.0
+TWO_THIRD = 2.0 / 3.0
+
+
+def _hls_channel(m1, m2, hue):
+    # 等价于 hue % 1.0，但速度更快
+    hue = hue - np.floor(hue)
+    out = np.where(hue < 0.5, m2, m1)
+    rising = hue < ONE_SIXTH
+    falling = (hue >= 0.5) & (hue < TWO_THIRD)
+    out[rising] = m1[rising] + (m2[rising] - m1[rising]) * hue[rising] * 6.0
+    out[falling] = m1[falling] + (m2[falling] - m1[falling]) * (TWO_THIRD - hue[falling]) * 6.0
+    return out
+
+
+def hls_to_rgb_array(h, l, s):
+    # colorsys.hls_to_rgb 的数组版本，参数均为 0-1
+    # s 为 0 时 m1 == m2 == l，三个通道自然等于 l，无需单独处理灰色
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - (l * s))
+    m1 = 2.0 * l - m2
+    r = _hls_channel(m1, m2, h + ONE_THIRD)
+    g = _hls_channel(m1, m2, h)
+    b = _hls_channel(m1, m2, h - ONE_THIRD)
+    return r, g, b
+
+
+# HSV 六个色相区间内 R/G/B 分别取 (v, t, p, q) 中的哪一个
+HSV_SECTOR_TABLE = (
+    (0, 3, 2, 2, 1, 0),
+    (1, 0, 0, 3, 2, 2),
+    (2, 2, 1, 0, 0, 3),
+)
+
+
+def hsv_to_rgb_array(h, s, v):
+    # colorsys.hsv_to_rgb 的数组版本，参数均为 0-1
+    # s 为 0 时 p == q == t == v，三个通道自然等于 v，无需单独处理灰色
+    h6 = h * 6.0
+    i = np.floor(h6)
+    f = h6 - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    sector = i.astype(np.int64) % 6
+    candidates = np.stack([v, t, p, q])
+    return tuple(
+        np.take_along_axis(candidates, np.asarray(table)[sector][np.newaxis], axis=0)[0]
+        for table in HSV_SECTOR_TABLE
+    )
+
+
+def hsl_hsv_to_rgb(mode, h, s, x):
+    # h 为角度 (0-360)，s 和 L/V 为百分比 (0-100)
+    h = h / 360
+    s = s / 100
+    x = x / 100
+    if mode == "HSV":
+        return to_rgb255(*hsv_to_rgb_array(h, s, x))
+    return to_rgb255(*hls_to_rgb_array(h, x, s))
+
+
+def cmyk_to_rgb_array(c, m, y, k):
+    # 与 colormath 相同的 CMYK -> CMY -> sRGB 转换，参数均为 0-1
+    r = 1.0 - (c * (1.0 - k) + k)
+    g = 1.0 - (m * (1.0 - k) + k)
+    b = 1.0 - (y * (1.0 - k) + k)
+    return r, g, b
+
+
+def colormath_to_rgb_array(color_class, *channels):
+    # 逐点调用 colormath 的参考实现，用于校验数组内核或作为备用转换
+    values = np.array([
+        color_conversions.convert_color(color_class(*point), color_objects.sRGBColor).get_value_tuple()
+        for point in zip(*(channel.tolist() for channel in channels))
+    ], dtype=np.float64).reshape(-1, 3)
+    return values[:, 0], values[:, 1], values[:, 2]
+
+
+def cmyk_to_rgb(c, m, y, k, backend="numpy"):
+    # c/m/y/k 为百分比 (0-100)；backend 为 "colormath" 时使用逐点参考实现
+    c, m, y, k = c / 100, m / 100, y / 100, k / 100
+    if backend == "colormath":
+        return to_rgb255(*colormath_to_rgb_array(color_objects.CMYKColor, c, m, y, k))
+    return to_rgb255(*cmyk_to_rgb_array(c, m, y, k))
+
+
+# 以下常量与 colormath 的默认设置保持一致（2° 观察者，Bradford 色适应）
+# 矩阵以元组保存，使用时由 numpy 转换，避免导入本模块时就加载 numpy
+CIE_E = 216.0 / 24389.0
+ILLUMINANTS = {
+    "d50": (0.96422, 1.00000, 0.82521),
+    "d65": (0.95047, 1.00000, 1.08883),
+}
+BRADFORD = (
+    (0.8951, 0.2664, -0.1614),
+    (-0.7502, 1.7135, 0.0367),
+    (0.0389, -0.0685, 1.0296),
+)
+SRGB_XYZ_TO_RGB = (
+    (3.24071, -1.53726, -0.498571),
+    (-0.969258, 1.87599, 0.0415557),
+    (0.0556352, -0.203996, 1.05707),
+)
+# sRGB 的原生白点
+SRGB_ILLUMINANT = "d65"
+
+
+def chromatic_adaptation_matrix(orig_illum, targ_illum):
+    # Bradford 色适应矩阵，计算方式与 colormath 相同
+    wp_src = np.array(ILLUMINANTS[orig_illum])
+    wp_dst = np.array(ILLUMINANTS[targ_illum])
+    rgb_src = np.dot(BRADFORD, wp_src)
+    rgb_dst = np.dot(BRADFORD, wp_dst)
+    m_rat = np.diag(rgb_dst / rgb_src)
+    return np.dot(np.dot(np.linalg.pinv(BRADFORD), m_rat), BRADFORD)
+
+
+def lab_to_xyz_array(l, a, b, illuminant="d50"):
+    white = ILLUMINANTS[illuminant]
+    fy = (l + 16.0) / 116.0
+    fx = a / 500.0 + fy
+    fz = fy - b / 200.0
+    return tuple(
+        w * np.where(f ** 3 > CIE_E, f ** 3, (f - 16.0 / 116.0) / 7.787)
+        for w, f in zip(white, (fx, fy, fz))
+    )
+
+
+def xyz_to_linear_rgb_array(x, y, z, illuminant="d65"):
+    # XYZ -> 线性 sRGB（未截断），返回形状为 3 × 点数的数组
+    xyz = np.stack([x, y, z])
+    if illuminant != SRGB_ILLUMINANT:
+        xyz = np.dot(chromatic_adaptation_matrix(illuminant, SRGB_ILLUMINANT), xyz)
+    return np.dot(SRGB_XYZ_TO_RGB, xyz)
+
+
+def xyz_to_rgb_array(x, y, z, illuminant="d65"):
+    # XYZ -> 线性 sRGB（负值截断为 0，与 colormath 一致）-> sRGB 伽马校正
+    linear = np.maximum(xyz_to_linear_rgb_array(x, y, z, illuminant), 0.0)
+    return tuple(
+        np.where(v <= 0.0031308, v * 12.92, 1.055 * v ** (1 / 2.4) - 0.055)
+        for v in linear
+    )
+
+
+def lab_to_rgb_array(l, a, b, illuminant="d50"):
+    # Lab -> XYZ -> 线性 RGB -> sRGB，默认光源与 colormath 的 LabColor 相同
+    return xyz_to_rgb_array(*lab_to_xyz_array(l, a, b, illuminant), illuminant=illuminant)
+
+
+# 本程序使用的 YUV -> RGB 系数矩阵，作用于 (Y, U - 0.5, V - 0.5)
+YUV_TO_RGB = (
+    (1.0, 0.0, 1.4075),
+    (1.0, -0.3455, -0.7169),
+    (1.0, 1.7790, 0.0),
+)
+
+
+def yuv_to_rgb(y, u, v):
+    rgb = np.clip(np.dot(YUV_TO_RGB, np.stack([y, u - 0.5, v - 0.5])), 0.0, 1.0)
+    return to_rgb255(*rgb)
+
+
+def lab_to_rgb(l, a, b, backend="numpy"):
+    # backend 为 "colormath" 时使用逐点参考实现
+    if backend == "colormath":
+        return to_rgb255(*colormath_to_rgb_array(color_objects.LabColor, l, a, b))
+    return to_rgb255(*lab_to_rgb_array(l, a, b))
+
+
+# ===================== sRGB 色域判断 =====================
+
+# 只有 Lab 和 YUV 的网格会超出 sRGB 色域
+GAMUT_SPACES = ("Lab", "YUV")
+# 色域外的点的处理方式：保留（截断到 0-255）、去掉，或保留并在 IN_GAMUT 列中标记
+OUT_OF_GAMUT_MODES = ("keep", "drop", "flag")
+GAMUT_FIELD = "IN_GAMUT"
+# 伽马校正后的 sRGB 值不经截断就能四舍五入到 0-255 的范围，以及对应的线性 sRGB 范围
+GAMUT_MIN = -0.5 / 255
+GAMUT_MAX = 255.5 / 255
+GAMUT_LINEAR_MIN = GAMUT_MIN / 12.92
+GAMUT_LINEAR_MAX = ((GAMUT_MAX + 0.055) / 1.055) ** 2.4
+
+
+def lab_gamut_mask(l, a, b, illuminant="d50"):
+    # 在 sRGB 色域内的点为 True：未截断的线性 sRGB 三个通道都在范围内
+    linear = xyz_to_linear_rgb_array(*lab_to_xyz_array(l, a, b, illuminant), illuminant=illuminant)
+    return np.all((linear >= GAMUT_LINEAR_MIN) & (linear < GAMUT_LINEAR_MAX), axis=0)
+
+
+def yuv_gamut_mask(y, u, v):
+    rgb = np.dot(YUV_TO_RGB, np.stack([y, u - 0.5, v - 0.5]))
+    return np.all((rgb >= GAMUT_MIN) & (rgb < GAMUT_MAX), axis=0)
+
+
+GAMUT_MASKS = {"Lab": lab_gamut_mask, "YUV": yuv_gamut_mask}
+
+
+# ===================== RGB -> 各色彩空间（反向转换） =====================
+
+# sRGB 线性值 -> XYZ 的矩阵，与 colormath 的 sRGBColor 相同
+SRGB_RGB_TO_XYZ = (
+    (0.412424, 0.357579, 0.180464),
+    (0.212656, 0.715158, 0.0721856),
+    (0.0193324, 0.119193, 0.950444),
+)
+
+
+class RGBExtremes:
+    # colorsys 中 rgb_to_hls / rgb_to_hsv 共用的中间结果：最大值、最小值、极差和色相（0-1，灰色为 0）
+    def __init__(self, r, g, b):
+        self.maxc = np.maximum(np.maximum(r, g), b)
+        self.minc = np.minimum(np.minimum(r, g), b)
+        self.rangec = self.maxc - self.minc
+        gray = self.rangec == 0
+        safe_range = np.where(gray, 1.0, self.rangec)
+        rc = (self.maxc - r) / safe_range
+        gc = (self.maxc - g) / safe_range
+        bc = (self.maxc - b) / safe_range
+        h = np.where(r == self.maxc, bc - gc, np.where(g == self.maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+        self.hue = np.where(gray, 0.0, (h / 6.0) % 1.0)
+    
+    def hls(self):
+        maxc, minc, rangec = self.maxc, self.minc, self.rangec
+        sumc = maxc + minc
+        l = sumc / 2.0
+        gray = rangec == 0
+        s = np.where(
+            l <= 0.5,
+            rangec / np.where(gray, 1.0, sumc),
+            rangec / np.where(gray, 1.0, 2.0 - maxc - minc)
+        )
+        return self.hue, l, s
+    
+    def hsv(self):
+        s = self.rangec / np.where(self.maxc == 0, 1.0, self.maxc)
+        return self.hue, s, self.maxc
+
+
+def rgb_to_hls_array(r, g, b):
+    # colorsys.rgb_to_hls 的数组版本，参数均为 0-1
+    return RGBExtremes(r, g, b).hls()
+
+
+def rgb_to_hsv_array(r, g, b):
+    # colorsys.rgb_to_hsv 的数组版本，参数均为 0-1
+    return RGBExtremes(r, g, b).hsv()
+
+
+def rgb_to_cmyk_array(r, g, b):
+    # 与 colormath 相同的 sRGB -> CMY -> CMYK 转换，参数均为 0-1
+    cmy = [1.0 - r, 1.0 - g, 1.0 - b]
+    k = np.minimum(np.minimum(np.minimum(cmy[0], cmy[1]), cmy[2]), 1.0)
+    black = k == 1
+    denominator = np.where(black, 1.0, 1.0 - k)
+    return tuple(np.where(black, 0.0, (value - k) / denominator) for value in cmy) + (k,)
+
+
+def rgb_to_yuv_array(r, g, b):
+    # yuv_to_rgb 的逆变换（不含截断），参数均为 0-1
+    y, u, v = np.dot(np.linalg.inv(YUV_TO_RGB), np.stack([r, g, b]))
+    return y, u + 0.5, v + 0.5
+
+
+def rgb_to_xyz_array(r, g, b, illuminant="d50"):
+    # sRGB -> 线性 RGB -> XYZ（sRGB 原生白点），再用 Bradford 适应到目标光源，与 colormath 一致
+    linear = [np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4) for v in (r, g, b)]
+    xyz = np.dot(SRGB_RGB_TO_XYZ, np.stack(linear))
+    if illuminant != SRGB_ILLUMINANT:
+        xyz = np.dot(chromatic_adaptation_matrix(SRGB_ILLUMINANT, illuminant), xyz)
+    return tuple(xyz)
+
+
+def xyz_to_lab_array(x, y, z, illuminant="d50"):
+    fx, fy, fz = (
+        np.where(t > CIE_E, t ** (1.0 / 3.0), 7.787 * t + 16.0 / 116.0)
+        for t in (value / w for value, w in zip((x, y, z), ILLUMINANTS[illuminant]))
+    )
+    return 116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz)
+
+
+def rgb_to_lab_array(r, g, b, illuminant="d50"):
+    # 默认光源与本程序 Lab -> RGB 所用的 LabColor 相同，因此是 lab_to_rgb_array 的逆变换
+    return xyz_to_lab_array(*rgb_to_xyz_array(r, g, b, illuminant), illuminant=illuminant)
+
+
+def rgb_to_color_spaces(spaces, r, g, b):
+    # 0-255 的 RGB 数组同时转换到多个色彩空间，返回 {色彩空间: 各通道坐标}
+    # 通道顺序和单位与界面输入一致（H 为角度，S/L/V 和 CMYK 为百分比，YUV 为 0-1，Lab 为 L/a/b）
+    # 归一化的 RGB 只计算一次，HSL 与 HSV 共用最大/最小值和色相
+    r, g, b = (np.asarray(channel, dtype=np.float64) / 255.0 for channel in (r, g, b))
+    extremes = RGBExtremes(r, g, b) if "HSL" in spaces or "HSV" in spaces else None
+    result = {}
+    for color_space in spaces:
+        if color_space == "HSL":
+            h, l, s = extremes.hls()
+            result[color_space] = (h * 360.0, s * 100.0, l * 100.0)
+        elif color_space == "HSV":
+            h, s, v = extremes.hsv()
+            result[color_space] = (h * 360.0, s * 100.0, v * 100.0)
+        elif color_space == "CMYK":
+            result[color_space] = tuple(value * 100.0 for value in rgb_to_cmyk_array(r, g, b))
+        elif color_space == "YUV":
+            result[color_space] = rgb_to_yuv_array(r, g, b)
+        elif color_space == "Lab":
+            result[color_space] = rgb_to_lab_array(r, g, b)
+        elif color_space == "RGB":
+            result[color_space] = (r * 255.0, g * 255.0, b * 255.0)
+        else:
+            raise ValueError(f"不支持反向转换到色彩空间: {color_space}")
+    return result
+
+
+def rgb_to_color_space(color_space, r, g, b):
+    # 0-255 的 RGB 数组 -> 指定色彩空间的坐标
+    return rgb_to_color_spaces([color_space], r, g, b)[color_space]
+
+
+# ===================== 转换结果缓存 =====================
+
+# 可以缓存的色彩空间（整数网格、转换较慢）
+LUT_CACHE_SPACES = ("Lab", "CMYK")
+# 转换内核改变时递增，使旧的缓存块失效
+LUT_CACHE_VERSION = 1
+# 默认缓存目录和容量上限
+LUT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".color_space_generator", "lut_cache")
+LUT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ConversionCache:
+    # 磁盘上的转换结果缓存：把整数坐标空间切成边长为 block_size 的块，
+    # 每块所有整数点的 RGB 结果存为一个 int16 的 .npy 文件，文件名由色彩空间、转换设置和块坐标组成。
+    # 不同范围、不同步长的网格只要落在同一块中就能复用。
+    # 命中时更新文件修改时间，总大小超过 max_bytes 时按修改时间淘汰最久未用的块（LRU）。
+    # 最近使用的块同时保留在内存中，连续批次访问同一块时不必重复读盘。
+    def __init__(self, cache_dir=LUT_CACHE_DIR, max_bytes=LUT_CACHE_MAX_BYTES, block_size=16, memory_blocks=64):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.memory_blocks = memory_blocks
+        self.hits = 0
+        self.misses = 0
+        self.memory = collections.OrderedDict()
+        os.makedirs(cache_dir, exist_ok=True)
+        # 统计已有缓存的大小，超出上限时顺便淘汰
+        self.size = 0
+        self.evict()
+    
+    def settings(self):
+        # 在子进程中重建缓存对象所需的参数
+        return {
+            "cache_dir": self.cache_dir,
+            "max_bytes": self.max_bytes,
+            "block_size": self.block_size,
+            "memory_blocks": self.memory_blocks,
+        }
+    
+    def block_path(self, space, backend, block):
+        name = f"{space.lower()}-{backend}-v{LUT_CACHE_VERSION}-b{self.block_size}-" + "_".join(map(str, block))
+        return os.path.join(self.cache_dir, name + ".npy")
+    
+    def lookup(self, space, backend, channels, convert):
+        # 用缓存块代替逐点转换；channels 为各通道的整数坐标数组，convert 为未缓存时的转换函数
+        size = self.block_size
+        coords = [np.asarray(channel, dtype=np.int64) for channel in channels]
+        if not len(coords[0]):
+            # 整批点都被去掉（如色域外的点）时没有需要查找的块
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty.copy(), empty.copy()
+        blocks = [channel // size for channel in coords]
+        offsets = [channel - block * size for channel, block in zip(coords, blocks)]
+        
+        # 按块分组：把各维块坐标合成一个整数键后排序，同一块的点只需读取一次
+        low = [int(block.min()) for block in blocks]
+        extent = tuple(int(block.max()) - base + 1 for block, base in zip(blocks, low))
+        keys = np.ravel_multi_index(tuple(block - base for block, base in zip(blocks, low)), extent)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(sorted_keys)) + 1, [len(keys)]))
+        
+        rgb = np.empty((3, len(keys)), dtype=np.int64)
+        for group_start, group_stop in zip(bounds[:-1], bounds[1:]):
+            points = order[group_start:group_stop]
+            index = np.unravel_index(sorted_keys[group_start], extent)
+            block = tuple(int(i) + base for i, base in zip(index, low))
+            table = self.get_block(space, backend, block, convert)
+            rgb[:, points] = table[(slice(None),) + tuple(offset[points] for offset in offsets)]
+        return rgb[0], rgb[1], rgb[2]
+    
+    def get_block(self, space, backend, block, convert):
+        key = (space, backend, block)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+        
+        path = self.block_path(space, backend, block)
+        try:
+            table = np.load(path)
+            os.utime(path)
+            self.hits += 1
+        except (OSError, ValueError):
+            # 文件不存在、已被其他进程淘汰或已损坏时重新计算
+            table = self.compute_block(block, convert)
+            self.save_block(path, table)
+            self.misses += 1
+        
+        self.memory[key] = table
+        if len(self.memory) > self.memory_blocks:
+            self.memory.popitem(last=False)
+        return table
+    
+    def compute_block(self, block, convert):
+        # 计算一块内所有整数点的 RGB，结果形状为 (3, size, size, ...)
+        size = self.block_size
+        shape = (size,) * len(block)
+        indices = np.unravel_index(np.arange(size ** len(block)), shape)
+        channels = tuple(start * size + index for start, index in zip(block, indices))
+        return np.stack(convert(channels)).astype(np.int16).reshape((3,) + shape)
+    
+    def save_block(self, path, table):
+        # 先写临时文件再替换，多个进程同时写同一块也不会留下不完整的文件
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, table)
+        os.replace(temp_path, path)
+        self.size += os.path.getsize(path)
+        if self.size > self.max_bytes:
+            self.evict()
+    
+    def evict(self):
+        # 按修改时间从旧到新删除，直到总大小降到上限的 90%；
+        # 其他进程可能同时在淘汰，已经消失的文件直接跳过
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npy"):
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, entry.path))
+        entries.sort()
+        self.size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.size -= size
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self.size,
+        }
+
+
+# ===================== 与界面无关的生成核心 =====================
+
+# 各色彩空间的通道名称（按网格维度顺序）
+COLOR_SPACE_CHANNELS = {
+    "RGB": ["R", "G", "B"],
+    "HSL": ["H", "S", "L"],
+    "HSV": ["H", "S", "V"],
+    "CMYK": ["C", "M", "Y", "K"],
+    "YUV": ["Y", "U", "V"],
+    "Lab": ["L", "a", "b"],
+    "HEX": ["HEX"],
+}
+
+# 输出字段对应的 SQLite 列名
+SQLITE_COLUMNS = {
+    "HSL": {"H": "h", "S": "s", "L": "l"},
+    "HSV": {"H": "h", "S": "s", "V": "hsv_v"},
+    "CMYK": {"C": "c", "M": "m", "Y": "y", "K": "k"},
+    "YUV": {"Y": "y_val", "U": "u", "V": "v"},
+    "Lab": {"L": "l_val", "a": "a", "b": "b_val"},
+}
+SQLITE_COMMON_COLUMNS = {"R": "r", "G": "g", "B": "b", "HEX": "hex"}
+# 多色彩空间输出时可以附加的色彩空间（RGB 和 HEX 本来就在每一行中）
+EXTRA_SPACES = ("HSL", "HSV", "CMYK", "YUV", "Lab")
+
+
+def extra_space_fields(spaces):
+    # 附加色彩空间的列名，如 HSL_H、Lab_a；SQLite 中使用小写列名（hsl_h、lab_a）
+    return [f"{space}_{name}" for space in spaces for name in COLOR_SPACE_CHANNELS[space]]
+
+
+# 各色彩空间每个通道允许的取值范围（同时作为命令行的默认范围）
+CHANNEL_LIMITS = {
+    "RGB": [(0, 255), (0, 255), (0, 255)],
+    "HSL": [(0, 360), (0, 100), (0, 100)],
+    "HSV": [(0, 360), (0, 100), (0, 100)],
+    "CMYK": [(0, 100), (0, 100), (0, 100), (0, 100)],
+    "YUV": [(0, 1), (-0.5, 0.5), (-0.5, 0.5)],
+    "Lab": [(0, 100), (-128, 127), (-128, 127)],
+    "HEX": [("000000", "FFFFFF")],
+}
+CHANNEL_LIMIT_MESSAGES = {
+    "RGB": "RGB 值必须在 0-255 之间",
+    "HSL": "H 范围 0-360, S/L 范围 0-100",
+    "HSV": "H 范围 0-360, S/L 范围 0-100",
+    "CMYK": "CMYK 值必须在 0-100 之间",
+    "YUV": "Y 范围 0-1, U/V 范围 -0.5-0.5",
+    "Lab": "L 范围 0-100, a/b 范围 -128-127",
+}
+
+
+def validate_parameters(color_space, ranges, step):
+    # 界面和命令行共用的输入检查，不合法时抛出 ValueError
+    if color_space not in CHANNEL_LIMITS:
+        raise ValueError(f"不支持的色彩空间: {color_space}")
+    
+    if color_space == "HEX":
+        for value in ranges[0]:
+            if len(value) != 6:
+                raise ValueError("HEX 值必须是6位字符")
+            try:
+                int(value, 16)
+            except ValueError:
+                raise ValueError("HEX 值必须是有效的十六进制数")
+    else:
+        for (v_min, v_max), (low, high) in zip(ranges, CHANNEL_LIMITS[color_space]):
+            if not (low <= v_min <= high and low <= v_max <= high):
+                raise ValueError(CHANNEL_LIMIT_MESSAGES[color_space])
+    
+    if step <= 0:
+        raise ValueError("YUV 步长必须大于 0" if color_space == "YUV" else "步长必须大于 0")
+
+
+class RGBSet:
+    # 24 位 RGB 颜色的集合，用 2^24 位（2 MB）的位图记录，内存占用与生成规模无关
+    def __init__(self, bits=None):
+        if bits is None:
+            self.bits = np.zeros(RGB_CUBE_SIZE // 8, dtype=np.uint8)
+            self.count = 0
+        else:
+            self.bits = bits
+            self.count = int(np.unpackbits(bits).sum())
+    
+    def __len__(self):
+        return self.count
+    
+    def __contains__(self, rgb):
+        return bool((int(self.bits[rgb >> 3]) >> (rgb & 7)) & 1)
+    
+    def add_new(self, packed):
+        # 将一批打包后的 RGB 加入集合，返回布尔掩码：
+        # 此前没有出现过的颜色只在本批中第一次出现的位置为 True
+        packed = np.asarray(packed, dtype=np.int64)
+        mask = np.zeros(len(packed), dtype=bool)
+        # 先用位图筛掉已经出现过的颜色，重复率高时后面的排序只处理少量候选
+        candidates = np.flatnonzero(((self.bits[packed >> 3] >> (packed & 7).astype(np.uint8)) & 1) == 0)
+        values, first = np.unique(packed[candidates], return_index=True)
+        if not len(values):
+            return mask
+        mask[candidates[first]] = True
+        # values 已排序，同一字节的多个新颜色先合并再写回位图
+        byte_index = values >> 3
+        bit_values = (1 << (values & 7)).astype(np.uint8)
+        starts = np.flatnonzero(np.r_[True, byte_index[1:] != byte_index[:-1]])
+        self.bits[byte_index[starts]] |= np.bitwise_or.reduceat(bit_values, starts)
+        self.count += len(values)
+        return mask
+    
+    def sha256(self):
+        return hashlib.sha256(self.bits.data).hexdigest()
+    
+    def save(self, path):
+        # 先写临时文件再替换，与断点文件的写法相同
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.bits.data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path):
+        return cls(np.fromfile(path, dtype=np.uint8))
+
+
+class ColorBatch:
+    # 一批生成结果：各通道数组、对应的 RGB 数组和 HEX 字符串
+    # HEX 字符串在第一次访问时才生成（二进制输出用不到，且占转换耗时的大部分）
+    # stop 为本批在网格中的结束下标；去重过滤后行数变少，但 stop 不变，用于记录进度
+    # out_of_gamut 为本批中超出 sRGB 色域的点数（已去掉或已标记），timings 为生成本批各阶段的耗时（秒）
+    def __init__(self, start, channels, r, g, b, hex_prefix="#"):
+        self.start = start
+        self.stop = start + len(r)
+        self.out_of_gamut = 0
+        self.timings = {}
+        self.channels = channels
+        self.r = r
+        self.g = g
+        self.b = b
+        self.hex_prefix = hex_prefix
+        self._hex = None
+    
+    @property
+    def hex(self):
+        if self._hex is None:
+            self._hex = rgb_to_hex_array(self.r, self.g, self.b, prefix=self.hex_prefix)
+        return self._hex
+    
+    def __len__(self):
+        return len(self.r)
+    
+    def column(self, name):
+        # 以 Python 列表形式返回某个输出字段
+        if name == "HEX":
+            return self.hex
+        if name in ("R", "G", "B"):
+            return getattr(self, name.lower()).tolist()
+        return self.channels[name].tolist()
+    
+    def rows(self, fields):
+        return zip(*(self.column(name) for name in fields))
+    
+    def packed_rgb(self):
+        return pack_rgb(self.r, self.g, self.b)
+    
+    def filter(self, mask):
+        # 只保留 mask 为 True 的行（已生成的 HEX 字符串一并筛选）
+        batch = ColorBatch(
+            self.start,
+            {name: values[mask] for name, values in self.channels.items()},
+            self.r[mask], self.g[mask], self.b[mask],
+            hex_prefix=self.hex_prefix
+        )
+        batch.stop = self.stop
+        batch.out_of_gamut = self.out_of_gamut
+        batch.timings = dict(self.timings)
+        if self._hex is not None:
+            batch._hex = list(itertools.compress(self._hex, mask.tolist()))
+        return batch
+
+
+class ColorSpaceGenerator:
+    # 根据色彩空间、各通道范围和步长枚举网格，并按批次输出转换结果
+    # ranges 为每个通道的 (最小值, 最大值)；HEX 空间为 [(起始值, 结束值)]，可以是十六进制字符串
+    # workers 大于 1 时使用多进程并行转换；cache 为 ConversionCache 时 Lab/CMYK 的转换结果从缓存读取
+    # extra_spaces 为附加输出的色彩空间：每行再由（截断到 0-255 的）RGB 换算出这些空间的坐标
+    # unique_rgb 为 True 时每种 RGB 颜色只输出第一次出现的行，已输出的颜色记录在 seen_colors 中
+    # out_of_gamut 为 Lab/YUV 中超出 sRGB 色域的点的处理方式（见 OUT_OF_GAMUT_MODES），其他空间忽略
+    def __init__(self, color_space, ranges, step=1, backend="numpy", workers=1, cache=None, extra_spaces=(),
+                 unique_rgb=False, out_of_gamut="keep"):
+        if color_space not in COLOR_SPACE_CHANNELS:
+            raise ValueError(f"不支持的色彩空间: {color_space}")
+        if step <= 0:
+            raise ValueError("步长必须大于 0")
+        
+        self.color_space = color_space
+        self.channel_names = COLOR_SPACE_CHANNELS[color_space]
+        self.step = step
+        self.backend = backend
+        self.workers = max(1, int(workers))
+        self.cache = cache if color_space in LUT_CACHE_SPACES else None
+        for space in extra_spaces:
+            if space not in EXTRA_SPACES:
+                raise ValueError(f"不支持附加输出的色彩空间: {space}")
+        # 源色彩空间本身的坐标已经在输出中，不再重复
+        self.extra_spaces = [space for space in EXTRA_SPACES if space in extra_spaces and space != color_space]
+        if out_of_gamut not in OUT_OF_GAMUT_MODES:
+            raise ValueError(f"不支持的色域外处理方式: {out_of_gamut}")
+        self.out_of_gamut = out_of_gamut if color_space in GAMUT_SPACES else "keep"
+        self.out_of_gamut_count = 0
+        # 附加列：色域标记列在前，其后为附加色彩空间的坐标
+        self.extra_fields = [GAMUT_FIELD] if self.out_of_gamut == "flag" else []
+        self.extra_fields += extra_space_fields(self.extra_spaces)
+        self.unique_rgb = bool(unique_rgb)
+        self.seen_colors = None
+        
+        if color_space == "HEX":
+            start_val, end_val = [int(v, 16) if isinstance(v, str) else v for v in ranges[0]]
+            if start_val > end_val:
+                start_val, end_val = end_val, start_val
+            ranges = [(start_val, end_val)]
+        if len(ranges) != len(self.channel_names):
+            raise ValueError(f"{color_space} 需要 {len(self.channel_names)} 个通道范围")
+        self.ranges = [tuple(r) for r in ranges]
+        
+        self.grid = ColorGrid(self.ranges, step, float_values=color_space == "YUV")
+        self.total = self.grid.size
+        
+        # 输出字段顺序与原有文件格式保持一致
+        if color_space == "RGB":
+            self.fields = ["R", "G", "B", "HEX"]
+        elif color_space == "HEX":
+            self.fields = ["HEX", "R", "G", "B"]
+        else:
+            self.fields = self.channel_names + ["R", "G", "B", "HEX"]
+        self.fields = self.fields + self.extra_fields
+    
+    def __len__(self):
+        return self.total
+    
+    def coords_at(self, index):
+        # 第 index 种颜色的网格坐标（HEX 空间为打包后的 RGB 整数）
+        return self.grid.coords_at(index)
+    
+    def index_of(self, coords):
+        # 网格坐标对应的线性下标，也就是该颜色在输出文件中的行号（从 0 开始）
+        if self.color_space == "HEX":
+            coords = [int(v, 16) if isinstance(v, str) else v for v in coords]
+        return self.grid.index_of(coords)
+    
+    def color_at(self, index):
+        # 直接计算第 index 种颜色，字段与 CSV 表头一致
+        self.grid.unravel(index)
+        batch = self.make_batch(index, index + 1)
+        if not len(batch):
+            raise ValueError("该颜色超出 sRGB 色域，不会输出")
+        return dict(zip(self.fields, next(batch.rows(self.fields))))
+    
+    def parameters(self):
+        # 可序列化为 JSON 的生成参数
+        return {
+            "color_space": self.color_space,
+            "ranges": [list(r) for r in self.ranges],
+            "step": self.step,
+            "backend": self.backend,
+            "extra_spaces": self.extra_spaces,
+            "unique_rgb": self.unique_rgb,
+            "out_of_gamut": self.out_of_gamut,
+        }
+    
+    def convert(self, channels):
+        # 将一批网格坐标转换为 0-255 的 RGB 整数数组
+        if self.cache is not None:
+            return self.cache.lookup(self.color_space, self.backend, channels, self.convert_points)
+        return self.convert_points(channels)
+    
+    def convert_points(self, channels):
+        space = self.color_space
+        if space == "RGB":
+            return channels
+        if space in ("HSL", "HSV"):
+            return hsl_hsv_to_rgb(space, *channels)
+        if space == "CMYK":
+            return cmyk_to_rgb(*channels, backend=self.backend)
+        if space == "YUV":
+            return yuv_to_rgb(*channels)
+        if space == "Lab":
+            return lab_to_rgb(*channels, backend=self.backend)
+        return split_rgb(channels[0])
+    
+    def make_batch(self, start, stop):
+        # 生成并转换线性下标 [start, stop) 范围内的颜色
+        grid_started = time.perf_counter()
+        channels = self.grid.slice(start, stop)
+        convert_started = time.perf_counter()
+        in_gamut = None
+        if self.out_of_gamut != "keep":
+            in_gamut = GAMUT_MASKS[self.color_space](*channels)
+            if self.out_of_gamut == "drop":
+                # 色域外的点不再转换
+                channels = tuple(channel[in_gamut] for channel in channels)
+        r, g, b = self.convert(channels)
+        columns = dict(zip(self.channel_names, channels))
+        if self.out_of_gamut == "flag":
+            columns[GAMUT_FIELD] = in_gamut.astype(np.uint8)
+        if self.extra_spaces:
+            rgb = [np.clip(channel, 0, 255) for channel in (r, g, b)]
+            extra_values = rgb_to_color_spaces(self.extra_spaces, *rgb)
+            for space in self.extra_spaces:
+                columns.update(zip(extra_space_fields([space]), extra_values[space]))
+        batch = ColorBatch(
+            start,
+            columns,
+            r, g, b,
+            hex_prefix="" if self.color_space == "HEX" else "#"
+        )
+        batch.stop = stop
+        if in_gamut is not None:
+            batch.out_of_gamut = len(in_gamut) - int(np.count_nonzero(in_gamut))
+        batch.timings = {"grid": convert_started - grid_started, "convert": time.perf_counter() - convert_started}
+        return batch
+    
+    def plan_shards(self, batch_size=CHUNK_SIZE, start=0):
+        # 按线性下标把 [start, total) 切成连续的分片，每个分片不超过 batch_size 个点
+        # 分片数至少为进程数的 4 倍，以便各进程负载均衡（外层通道只有一个取值时也能并行）
+        remaining = self.total - start
+        if remaining <= 0:
+            return []
+        shard_size = min(batch_size, -(-remaining // (self.workers * 4)))
+        return [
+            (shard_start, min(shard_start + shard_size, self.total))
+            for shard_start in range(start, self.total, shard_size)
+        ]
+    
+    def iter_batches(self, batch_size=CHUNK_SIZE, start=0, with_hex=True):
+        # start 为开始的线性下标，用于从断点继续生成
+        # 去重模式下按网格顺序过滤每一批，批次的 stop 仍为网格中的位置
+        # with_hex 为 False 时（输出用不到 HEX 字符串）子进程不生成 HEX 字符串
+        if self.workers > 1:
+            batches = self._iter_parallel_batches(batch_size, start, with_hex)
+        else:
+            batches = (
+                self.make_batch(batch_start, min(batch_start + batch_size, self.total))
+                for batch_start in range(start, self.total, batch_size)
+            )
+        if not start:
+            self.out_of_gamut_count = 0
+            if self.unique_rgb:
+                self.seen_colors = RGBSet()
+        elif self.unique_rgb and self.seen_colors is None:
+            self.seen_colors = self.collect_seen_colors(start, batch_size)
+        for batch in batches:
+            self.out_of_gamut_count += batch.out_of_gamut
+            if self.unique_rgb:
+                filter_started = time.perf_counter()
+                batch = batch.filter(self.seen_colors.add_new(batch.packed_rgb()))
+                batch.timings["convert"] = batch.timings.get("convert", 0.0) + time.perf_counter() - filter_started
+            yield batch
+    
+    def collect_seen_colors(self, stop, batch_size=CHUNK_SIZE):
+        # 重新计算网格前 stop 个点中输出过的 RGB 颜色（续写时位图文件缺失或损坏才会用到）
+        seen_colors = RGBSet()
+        for batch_start in range(0, stop, batch_size):
+            seen_colors.add_new(self.make_batch(batch_start, min(batch_start + batch_size, stop)).packed_rgb())
+        return seen_colors
+    
+    def gamut_stats(self, processed=None):
+        # 色域统计：超出 sRGB 色域（已去掉或已标记）的点数及其比例，processed 为已处理的网格点数（默认全部）
+        processed = self.total if processed is None else processed
+        return {
+            "mode": self.out_of_gamut,
+            "out_of_gamut": self.out_of_gamut_count,
+            "out_of_gamut_rate": self.out_of_gamut_count / processed if processed else 0.0,
+        }
+    
+    def unique_stats(self, processed=None):
+        # 去重统计：输出的不同颜色数、跳过的重复行数和重复率，processed 为已处理的网格点数（默认全部）
+        # 去掉的色域外的点不计入重复
+        processed = self.total if processed is None else processed
+        if self.out_of_gamut == "drop":
+            processed -= self.out_of_gamut_count
+        unique = len(self.seen_colors) if self.seen_colors is not None else 0
+        duplicates = processed - unique
+        return {
+            "unique": unique,
+            "duplicates": duplicates,
+            "duplicate_rate": duplicates / processed if processed else 0.0,
+        }
+    
+    def _iter_parallel_batches(self, batch_size, start=0, with_hex=True):
+        # 在进程池中转换各分片，并按原顺序依次输出
+        # 界面在工作线程中生成，多线程进程中 fork 可能死锁，因此用 spawn 启动子进程
+        # （子进程根据 parameters() 重建生成器，不依赖从父进程继承的状态）
+        shards = iter(self.plan_shards(batch_size, start))
+        cache_settings = self.cache.settings() if self.cache is not None else None
+        pending = collections.deque()
+        executor = futures.ProcessPoolExecutor(max_workers=self.workers,
+                                               mp_context=multiprocessing.get_context("spawn"))
+        try:
+            for start, stop in itertools.islice(shards, self.workers * 2):
+                pending.append(executor.submit(build_shard, self.parameters(), start, stop, cache_settings, with_hex))
+            while pending:
+                batch, cache_stats = pending.popleft().result()
+                if cache_stats:
+                    self.cache.hits += cache_stats["hits"]
+                    self.cache.misses += cache_stats["misses"]
+                for start, stop in itertools.islice(shards, 1):
+                    pending.append(executor.submit(build_shard, self.parameters(), start, stop, cache_settings, with_hex))
+                yield batch
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 子进程中按设置复用的缓存对象，使内存中的块可以跨分片复用
+_shard_caches = {}
+
+
+def build_shard(parameters, start, stop, cache_settings=None, with_hex=True):
+    # 进程池中执行的任务：根据参数重建生成器并转换一个分片（with_hex 为 True 时 HEX 字符串也在子进程中生成）
+    # 使用缓存时一并返回本分片的命中/未命中次数，由主进程汇总
+    cache = None
+    if cache_settings:
+        key = tuple(sorted(cache_settings.items()))
+        if key not in _shard_caches:
+            _shard_caches[key] = ConversionCache(**cache_settings)
+        cache = _shard_caches[key]
+        hits, misses = cache.hits, cache.misses
+    
+    generator = ColorSpaceGenerator(**parameters, cache=cache)
+    batch = generator.make_batch(start, stop)
+    if with_hex:
+        format_started = time.perf_counter()
+        batch.hex
+        batch.timings["format"] = time.perf_counter() - format_started
+    if cache is None:
+        return batch, None
+    return batch, {"hits": cache.hits - hits, "misses": cache.misses - misses}
+
+
+# ===================== 运行统计 =====================
+
+# 分别统计耗时的阶段：网格坐标、色彩转换（含色域判断和去重）、格式化和写入
+TELEMETRY_STAGES = ("grid", "convert", "format", "write")
+TELEMETRY_STAGE_NAMES = {"grid": "网格", "convert": "转换", "format": "格式化", "write": "写入"}
+
+
+class RunTelemetry:
+    # 一次生成的吞吐量、预计剩余时间和各阶段耗时。
+    # 写入函数在开始时调用 begin()，每批写完后调用 batch_done()；
+    # grid/convert 由 make_batch 记录在批次上（并行时为各子进程耗时之和），format/write 在写入函数中计时。
+    # events_path 不为空时把每个事件追加到 JSON Lines 日志中
+    def __init__(self, events_path=None):
+        self.created = time.perf_counter()
+        self.started = None
+        self.stages = dict.fromkeys(TELEMETRY_STAGES, 0.0)
+        # 已计入各阶段的总时间，用于从外层阶段中扣除嵌套的写入时间
+        self.attributed = 0.0
+        self.start_done = self.done = self.total = 0
+        self.start_bytes = self.bytes = 0
+        self.start_rows = self.rows = 0
+        self.events_path = events_path
+        self.events_file = None
+    
+    def add(self, stage, seconds):
+        self.stages[stage] += seconds
+        self.attributed += seconds
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        # 计时一段代码，其中已计入其他阶段的时间（如缓冲区刷新时的实际写入）不重复计算
+        started = time.perf_counter()
+        attributed = self.attributed
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started - (self.attributed - attributed))
+    
+    def begin(self, done, total, bytes_written, rows=0):
+        # done 为开始时已完成的网格点数（断点续写时大于 0），bytes_written 和 rows 为输出文件已有的字节数和行数
+        self.started = time.perf_counter()
+        self.start_done = self.done = done
+        self.total = total
+        self.start_bytes = self.bytes = bytes_written
+        self.start_rows = self.rows = rows
+        self.log_event("start", done=done, total=total, bytes=bytes_written, rows=rows)
+    
+    def batch_done(self, batch, done, bytes_written):
+        for stage, seconds in batch.timings.items():
+            self.stages[stage] += seconds
+        self.done = done
+        self.rows += len(batch)
+        self.bytes = bytes_written
+        self.log_event("batch", **self.snapshot())
+    
+    def snapshot(self):
+        # 当前进度：points/rows/bytes 及对应的速度只计本次开始以来的部分（断点续写时不含之前写入的），
+        # 去重或去掉色域外的点时写入的行数少于处理的网格点数；output_rows 为输出文件中的总行数
+        # 预计剩余时间按网格点的处理速度计算
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        points = self.done - self.start_done
+        rows = self.rows - self.start_rows
+        written = self.bytes - self.start_bytes
+        points_per_sec = points / elapsed if elapsed > 0 else 0.0
+        return {
+            "done": self.done,
+            "total": self.total,
+            "points": points,
+            "rows": rows,
+            "output_rows": self.rows,
+            "bytes": written,
+            "elapsed": elapsed,
+            "points_per_sec": points_per_sec,
+            "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+            "bytes_per_sec": written / elapsed if elapsed > 0 else 0.0,
+            "eta": (self.total - self.done) / points_per_sec if points_per_sec > 0 else None,
+            "stages": dict(self.stages),
+        }
+    
+    def log_event(self, event, **fields):
+        if self.events_path is None:
+            return
+        if self.events_file is None:
+            self.events_file = open(self.events_path, "a", encoding="utf-8")
+        record = {"event": event, "time": datetime.now().isoformat()}
+        record.update(fields)
+        self.events_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.events_file.flush()
+    
+    def finish(self, status, error=None):
+        # 结束统计并关闭事件日志，返回最终的统计数据
+        stats = self.snapshot()
+        stats["setup"] = (self.started or time.perf_counter()) - self.created
+        stats["status"] = status
+        if error is not None:
+            stats["error"] = error
+        self.log_event("finish", **stats)
+        if self.events_file is not None:
+            self.events_file.close()
+            self.events_file = None
+        return stats
+
+
+class TimedWriter(io.RawIOBase):
+    # 统计实际写入文件（刷新缓冲区）所用的时间，计入 write 阶段
+    def __init__(self, raw, telemetry):
+        self.raw = raw
+        self.telemetry = telemetry
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        started = time.perf_counter()
+        written = self.raw.write(data)
+        self.telemetry.add("write", time.perf_counter() - started)
+        return written
+    
+    def close(self):
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def report_path(file_path):
+    # 运行报告与输出文件放在一起：<输出文件>.report.json
+    return file_path + ".report.json"
+
+
+def events_path(file_path):
+    # 可选的事件日志：<输出文件>.events.jsonl（每次运行追加）
+    return file_path + ".events.jsonl"
+
+
+def write_run_report(file_path, generator, output_format, stats):
+    # 生成结束（完成、取消或出错）后写入运行报告，stats 为 RunTelemetry.finish() 的返回值
+    report = {
+        "output": os.path.abspath(file_path),
+        "format": output_format,
+        "parameters": generator.parameters(),
+        "workers": generator.workers,
+        "finished_at": datetime.now().isoformat(),
+    }
+    report.update(stats)
+    if generator.cache is not None:
+        report["cache"] = generator.cache.stats()
+    if generator.unique_rgb:
+        report["unique"] = generator.unique_stats(stats["done"])
+    if generator.out_of_gamut != "keep":
+        report["gamut"] = generator.gamut_stats(stats["done"])
+    write_json_atomic(report_path(file_path), report)
+    return report
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:,.0f} {unit}" if unit == "B" else f"{count:,.1f} {unit}"
+        count /= 1024
+
+
+def throttle_progress(callback, interval=PROGRESS_INTERVAL):
+    # 包装进度回调：距上次调用不足 interval 秒时跳过，最后一次（done == total）总是调用
+    last_report = 0.0
+    
+    def on_progress(done, total):
+        nonlocal last_report
+        now = time.perf_counter()
+        if now - last_report >= interval or done == total:
+            last_report = now
+            callback(done, total)
+    return on_progress
+
+
+def progress_text(stats):
+    # 进度信息中的速度和预计剩余时间，界面和命令行共用
+    text = f"{stats['rows_per_sec']:,.0f} 行/秒"
+    if stats["points"] != stats["rows"]:
+        # 去重或去掉色域外的点时，处理的网格点多于写入的行
+        text += f"（{stats['points_per_sec']:,.0f} 网格点/秒）"
+    text += f"，{format_bytes(stats['bytes_per_sec'])}/秒"
+    if stats["eta"] is not None:
+        text += f"，剩余 {format_duration(stats['eta'])}"
+    return text
+
+
+def rows_text(stats, grid_total):
+    # 完成时的行数：输出文件中的总行数；去重或去掉色域外的点时注明网格点数，断点续写时注明本次写入的行数
+    text = f"共 {stats['output_rows']} 条"
+    notes = []
+    if stats["output_rows"] != grid_total:
+        notes.append(f"网格共 {grid_total} 个点")
+    if stats["rows"] != stats["output_rows"]:
+        notes.append(f"本次写入 {stats['rows']} 条")
+    if notes:
+        text += f"（{'，'.join(notes)}）"
+    return text
+
+
+def stages_text(stats):
+    return "，".join(f"{TELEMETRY_STAGE_NAMES[stage]} {stats['stages'][stage]:.2f} 秒" for stage in TELEMETRY_STAGES)
+
+
+# ===================== 性能分析 =====================
+
+# 摘要中列出的函数数和内存分配位置数
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_TOP_ALLOCATIONS = 20
+
+
+def profile_path(file_path):
+    # cProfile 统计数据：<输出文件>.prof，可用 pstats 或 snakeviz 等工具查看
+    return file_path + ".prof"
+
+
+def profile_summary_path(file_path):
+    # 文本摘要：<输出文件>.prof.txt
+    return file_path + ".prof.txt"
+
+
+def profile_title(generator, output_format):
+    # 摘要开头的说明：本次分析的色彩空间、输出格式和写入函数
+    lines = [
+        f"色彩空间: {generator.color_space}",
+        f"输出格式: {output_format}（{WRITERS[output_format].__name__}）",
+        f"颜色数: {generator.total}",
+        f"参数: {json.dumps(generator.parameters(), ensure_ascii=False)}",
+        f"分析时间: {datetime.now().isoformat()}",
+    ]
+    if generator.workers > 1:
+        lines.append(f"并行进程数: {generator.workers}（子进程中的网格和转换不在分析范围内）")
+    return "\n".join(lines)
+
+
+def run_profiled(func, file_path, title, trace_memory=False, top=PROFILE_TOP_FUNCTIONS):
+    # 在 cProfile 下调用 func() 并返回其结果。只分析调用线程，界面线程的事件循环不会混入结果；
+    # trace_memory 为 True 时同时用 tracemalloc 统计内存分配（会明显变慢）。
+    # 结束后（包括被取消或出错）保存 <输出文件>.prof 和按累计耗时排序的文本摘要
+    # 先导入 numpy，避免一次性的模块导入耗时混入分析结果
+    np.ndarray
+    profiler = cProfile.Profile()
+    if trace_memory:
+        tracemalloc.start()
+    finished = False
+    profiler.enable()
+    try:
+        result = func()
+        finished = True
+        return result
+    finally:
+        profiler.disable()
+        snapshot = peak = None
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        try:
+            write_profile(profiler, file_path, title, snapshot, peak, top)
+        except OSError:
+            # func() 本身出错时（如输出目录不可写）保留原来的异常
+            if finished:
+                raise
+
+
+def write_profile(profiler, file_path, title, snapshot=None, peak=None, top=PROFILE_TOP_FUNCTIONS):
+    profiler.dump_stats(profile_path(file_path))
+    summary = io.StringIO()
+    summary.write(title + "\n\n")
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+    if snapshot is not None:
+        # tracemalloc 统计的是所有线程的分配，这里去掉它自身的记录
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        summary.write(f"内存分配峰值: {format_bytes(peak)}\n")
+        summary.write(f"分配位置（按结束时仍占用的内存排序，前 {PROFILE_TOP_ALLOCATIONS} 项）:\n")
+        for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATIONS]:
+            summary.write(f"  {stat}\n")
+    with open(profile_summary_path(file_path), "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+
+
+# ===================== 断点续写 =====================
+
+def checkpoint_path(file_path):
+    # 断点文件与输出文件放在一起：<输出文件>.ckpt.json
+    return file_path + ".ckpt.json"
+
+
+def seen_colors_path(file_path):
+    # 去重模式下已输出颜色的位图：<输出文件>.ckpt.seen
+    return file_path + ".ckpt.seen"
+
+
+def read_checkpoint(file_path):
+    # 读取断点文件，不存在时返回 None
+    path = checkpoint_path(file_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def sqlite_checkpoint_options(schema, without_rowid=True):
+    # 断点中记录、续写时必须一致的 SQLite 写入选项；WITHOUT ROWID 只对紧凑表有意义
+    if schema == "compact":
+        return {"schema": schema, "without_rowid": without_rowid}
+    return {"schema": schema}
+
+
+def check_checkpoint(state, generator, output_format, **options):
+    # 断点记录的参数（以及 SQLite 表结构等写入选项）必须与本次生成完全一致才能继续
+    if state is None:
+        raise ValueError("没有找到断点文件，无法继续生成")
+    parameters = json.loads(json.dumps(generator.parameters()))
+    if (state.get("format") != output_format or state.get("parameters") != parameters
+            or any(state.get(name) != value for name, value in options.items())):
+        raise ValueError("断点文件与当前的生成参数不一致，无法继续生成")
+
+
+def write_json_atomic(path, data):
+    # 先写临时文件再替换，避免崩溃时留下不完整的 JSON 文件
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_checkpoint(file_path, state, generator=None):
+    # 一并保存生成器中需要跨断点延续的状态：色域外的点数；
+    # 去重模式下先保存已输出颜色的位图，并在断点中记录它的校验值
+    if generator is not None:
+        state["out_of_gamut"] = generator.out_of_gamut_count
+        if generator.seen_colors is not None:
+            generator.seen_colors.save(seen_colors_path(file_path))
+            state["seen_sha256"] = generator.seen_colors.sha256()
+    state["updated_at"] = datetime.now().isoformat()
+    write_json_atomic(checkpoint_path(file_path), state)
+
+
+def remove_checkpoint(file_path):
+    for path in (checkpoint_path(file_path), seen_colors_path(file_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def restore_generator_state(file_path, generator, state):
+    # 续写前恢复 save_checkpoint 保存的生成器状态。去重模式下位图文件缺失或与断点记录不一致
+    # （如保存断点的中途崩溃）时，按网格重新计算断点之前输出过的颜色
+    generator.out_of_gamut_count = state.get("out_of_gamut", 0)
+    if not generator.unique_rgb:
+        return
+    path = seen_colors_path(file_path)
+    seen_colors = RGBSet.load(path) if os.path.exists(path) else None
+    if seen_colors is None or seen_colors.sha256() != state.get("seen_sha256"):
+        seen_colors = generator.collect_seen_colors(state["completed"])
+    generator.seen_colors = seen_colors
+
+
+def new_checkpoint_state(generator, output_format):
+    return {
+        "parameters": generator.parameters(),
+        "format": output_format,
+        "total": generator.total,
+        "completed": 0,
+    }
+
+
+class ChecksumWriter(io.RawIOBase):
+    # 写入文件的同时累计 SHA-256，用于续写前校验已有内容
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        written = self.raw.write(data)
+        self.digest.update(memoryview(data)[:written])
+        return written
+    
+    def close(self):
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def file_sha256(file_path, size, block_size=1 << 20):
+    # 计算文件前 size 个字节的 SHA-256，返回 hashlib 对象以便继续累加
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        remaining = size
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+
+class OutputFile:
+    # 文件格式（CSV/JSON/NDJSON/NPY）的输出文件，binary 为 True 时 file 为二进制文件对象
+    # checkpoint 为 True 时每批写完后保存断点：已完成的线性下标、文件长度和内容校验值
+    # resume 为 True 时校验已有内容，截掉断点之后的残留数据，然后从断点继续追加
+    # telemetry 为 RunTelemetry（省略时新建一个），同时统计实际写入文件的时间
+    def __init__(self, file_path, generator, output_format, checkpoint=False, resume=False, newline=None,
+                 binary=False, telemetry=None):
+        self.file_path = file_path
+        self.generator = generator
+        self.telemetry = telemetry if telemetry is not None else RunTelemetry()
+        self.checkpoint = checkpoint or resume
+        self.state = new_checkpoint_state(generator, output_format)
+        
+        if not self.checkpoint:
+            self.raw = open(file_path, "wb", buffering=0)
+            stream = self.raw
+        elif resume:
+            state = read_checkpoint(file_path)
+            check_checkpoint(state, generator, output_format)
+            position = state["position"]
+            if not os.path.exists(file_path) or os.path.getsize(file_path) < position:
+                raise ValueError("输出文件比断点记录的短，无法继续生成")
+            self.digest = file_sha256(file_path, position)
+            if self.digest.hexdigest() != state["sha256"]:
+                raise ValueError("输出文件内容与断点记录的校验值不一致，无法继续生成")
+            self.state.update(state)
+            restore_generator_state(file_path, generator, state)
+            self.raw = open(file_path, "r+b", buffering=0)
+            self.raw.truncate(position)
+            self.raw.seek(position)
+        else:
+            remove_checkpoint(file_path)
+            self.digest = hashlib.sha256()
+            self.raw = open(file_path, "wb", buffering=0)
+        if self.checkpoint:
+            stream = ChecksumWriter(self.raw, self.digest)
+        # 已写入的行数：去重或去掉色域外的点时少于已处理的网格点数
+        self.rows = self.state.get("rows", self.state["completed"])
+        self.file = io.BufferedWriter(TimedWriter(stream, self.telemetry))
+        if not binary:
+            self.file = io.TextIOWrapper(self.file, newline=newline)
+    
+    @property
+    def completed(self):
+        return self.state["completed"]
+    
+    @property
+    def resumed(self):
+        return "position" in self.state
+    
+    def tell(self):
+        # 当前已写入的字节数
+        self.file.flush()
+        return self.raw.tell()
+    
+    def save(self, completed, rows):
+        # 数据落盘后再更新断点，保证断点记录的内容一定已经写入文件
+        self.rows = rows
+        if not self.checkpoint:
+            return
+        self.file.flush()
+        os.fsync(self.raw.fileno())
+        self.state["completed"] = completed
+        self.state["rows"] = rows
+        self.state["position"] = self.raw.tell()
+        self.state["sha256"] = self.digest.hexdigest()
+        save_checkpoint(self.file_path, self.state, self.generator)
+    
+    def close(self, finished):
+        # 完整生成后删除断点文件；被取消或出错时保留，以便之后继续
+        self.file.close()
+        if finished and self.checkpoint:
+            remove_checkpoint(self.file_path)
+
+
+def write_batches(output, format_batch, write=None, on_progress=None, is_cancelled=None, with_hex=True):
+    # 各写入函数共用的批次循环：从断点位置开始逐批生成，每批写完后保存断点、记录统计并报告进度
+    # output 为 OutputFile 或 SQLiteOutput；format_batch(batch) 在 format 阶段格式化本批，
+    # 返回值交给 write 在 write 阶段写入（省略 write 时 format_batch 直接写入缓冲区）
+    # 返回 True 表示完整生成，False 表示被取消
+    generator = output.generator
+    telemetry = output.telemetry
+    current_count = output.completed
+    row_count = output.rows
+    telemetry.begin(current_count, generator.total, output.tell(), row_count)
+    for batch in generator.iter_batches(start=current_count, with_hex=with_hex):
+        if is_cancelled and is_cancelled():
+            return False
+        
+        with telemetry.stage("format"):
+            formatted = format_batch(batch)
+        current_count = batch.stop
+        row_count += len(batch)
+        with telemetry.stage("write"):
+            if write is not None:
+                write(formatted)
+            output.save(current_count, row_count)
+        telemetry.batch_done(batch, current_count, output.tell())
+        if on_progress:
+            on_progress(current_count, generator.total)
+    return True
+
+
+def write_csv(generator, file_path, on_progress=None, is_cancelled=None, checkpoint=False, resume=False,
+              telemetry=None):
+    # 返回 True 表示完整生成，False 表示被取消
+    # telemetry 为 RunTelemetry 时记录速度和各阶段耗时（各写入函数相同）
+    output = OutputFile(file_path, generator, "CSV", checkpoint, resume, newline='', telemetry=telemetry)
+    finished = False
+    try:
+        writer = csv.writer(output.file)
+        if not output.resumed:
+            writer.writerow(generator.fields)
+        
+        if not write_batches(output, lambda batch: writer.writerows(batch.rows(generator.fields)),
+                             on_progress=on_progress, is_cancelled=is_cancelled):
+            return False
+        finished = True
+    finally:
+        output.close(finished)
+    return True
+
+
+def json_row_template(generator, indent=None):
+    # 生成单条颜色记录的格式化模板，输出与 json.dump 相同（HEX 为字符串，其余为数值）
+    keys = ["hex" if name == "HEX" else name for name in generator.fields]
+    parts = [(json.dumps("color_space"), json.dumps(generator.color_space).replace("%", "%%"))]
+    parts += [(json.dumps(key), '"%s"' if name == "HEX" else "%r") for key, name in zip(keys, generator.fields)]
+    if indent is None:
+        return "{" + ", ".join(f"{key}: {value}" for key, value in parts) + "}"
+    inner = "\n".join(f"{indent}  {key}: {value}," for key, value in parts)[:-1]
+    return f"{indent}{{\n{inner}\n{indent}}}"
+
+
+# JSON 头部中为 total_colors 预留的宽度，生成结束后回填
+TOTAL_COLORS_WIDTH = 20
+
+
+def write_json(generator, file_path, on_progress=None, is_cancelled=None, checkpoint=False, resume=False,
+               telemetry=None):
+    # 流式写入：先写 metadata，再逐批追加 colors，最后回填 total_colors
+    color_space = generator.color_space
+    template = json_row_template(generator, indent="    ")
+    separated_template = ",\n" + template
+    
+    output = OutputFile(file_path, generator, "JSON", checkpoint, resume, telemetry=telemetry)
+    finished = False
+    try:
+        jsonfile = output.file
+        if output.resumed:
+            # total_colors 的位置记录在断点中
+            total_position = output.state["total_position"]
+        else:
+            jsonfile.write("{\n  \"metadata\": {\n")
+            jsonfile.write(f"    \"color_space\": {json.dumps(color_space)},\n")
+            jsonfile.write(f"    \"generated_at\": {json.dumps(datetime.now().isoformat())},\n")
+            jsonfile.write("    \"total_colors\": ")
+            total_position = output.tell()
+            jsonfile.write(" " * TOTAL_COLORS_WIDTH + "\n  },\n  \"colors\": [")
+        output.state["total_position"] = total_position
+        
+        def format_batch(batch):
+            # 第一条记录前没有逗号；output.rows 为本批之前已写入的行数
+            rows = batch.rows(generator.fields)
+            if not output.rows and len(batch):
+                jsonfile.write("\n" + template % next(rows))
+            jsonfile.writelines(separated_template % row for row in rows)
+        
+        if not write_batches(output, format_batch, on_progress=on_progress, is_cancelled=is_cancelled):
+            return False
+        
+        row_count = output.rows
+        jsonfile.write("\n  ]\n}" if row_count else "]\n}")
+        jsonfile.flush()
+        # 文本文件只能回到 tell() 得到的位置，这里直接按字节偏移回填
+        with open(file_path, "r+b") as patch_file:
+            patch_file.seek(total_position)
+            patch_file.write(str(row_count).ljust(TOTAL_COLORS_WIDTH).encode("ascii"))
+        finished = True
+    finally:
+        output.close(finished)
+    return True
+
+
+def write_ndjson(generator, file_path, on_progress=None, is_cancelled=None, checkpoint=False, resume=False,
+                 telemetry=None):
+    # 每行一条 JSON 记录，便于下游逐行读取
+    template = json_row_template(generator) + "\n"
+    
+    output = OutputFile(file_path, generator, "NDJSON", checkpoint, resume, telemetry=telemetry)
+    finished = False
+    try:
+        if not write_batches(output, lambda batch: output.file.writelines(
+                template % row for row in batch.rows(generator.fields)),
+                on_progress=on_progress, is_cancelled=is_cancelled):
+            return False
+        finished = True
+    finally:
+        output.close(finished)
+    return True
+
+
+# NPY 头部中为回填行数预留的位数
+NPY_COUNT_WIDTH = 20
+
+
+def npy_dtype(generator):
+    # 每种色彩空间的定长记录：RGB 只存三个 uint8 通道；HEX 只存打包后的 uint32；
+    # 其余空间存各通道坐标（整数为 int16，YUV 为 float64）和打包后的 RGB；
+    # 多色彩空间输出时附加的各列为 float32，色域标记列为 uint8
+    space = generator.color_space
+    extra = [(name, "u1" if name == GAMUT_FIELD else "<f4") for name in generator.extra_fields]
+    if space == "RGB":
+        return np.dtype([(name, "u1") for name in generator.channel_names] + extra)
+    if space == "HEX":
+        return np.dtype([("rgb", "<u4")] + extra)
+    channel_type = "<f8" if space == "YUV" else "<i2"
+    return np.dtype([(name, channel_type) for name in generator.channel_names] + [("rgb", "<u4")] + extra)
+
+
+def npy_header(dtype, count):
+    # .npy 1.0 格式头部，长度只取决于 dtype（行数预留 NPY_COUNT_WIDTH 位），
+    # 用空格填充并按 64 字节对齐，生成结束后可以原位改写行数
+    template = "{'descr': %r, 'fortran_order': False, 'shape': (%%d,), }" % (np.lib.format.dtype_to_descr(dtype),)
+    size = -(-(10 + len(template % 0) + NPY_COUNT_WIDTH + 1) // 64) * 64
+    header = template % count
+    return (b"\x93NUMPY\x01\x00" + (size - 10).to_bytes(2, "little")
+            + header.ljust(size - 11).encode("latin1") + b"\n")
+
+
+def npy_records(generator, batch, dtype):
+    records = np.empty(len(batch), dtype=dtype)
+    for name in dtype.names:
+        if name == "rgb":
+            records[name] = batch.packed_rgb()
+        elif generator.color_space == "RGB" and name in ("R", "G", "B"):
+            records[name] = getattr(batch, name.lower())
+        else:
+            records[name] = batch.channels[name]
+    return records
+
+
+def write_npy(generator, file_path, on_progress=None, is_cancelled=None, checkpoint=False, resume=False,
+              telemetry=None):
+    # 二进制输出：单个 .npy 结构化数组，每行一条定长记录，可以直接用 np.load 读取
+    # 先按总数写头部，再逐批追加记录，最后按实际写入的行数回填头部
+    dtype = npy_dtype(generator)
+    output = OutputFile(file_path, generator, "NPY", checkpoint, resume, binary=True, telemetry=telemetry)
+    finished = False
+    try:
+        if not output.resumed:
+            output.file.write(npy_header(dtype, generator.total))
+        
+        if not write_batches(output, lambda batch: npy_records(generator, batch, dtype),
+                             lambda records: output.file.write(records.data),
+                             on_progress=on_progress, is_cancelled=is_cancelled, with_hex=False):
+            return False
+        
+        output.file.flush()
+        with open(file_path, "r+b") as patch_file:
+            patch_file.write(npy_header(dtype, output.rows))
+        finished = True
+    finally:
+        output.close(finished)
+    return True
+
+
+class PaletteReader:
+    # 以内存映射方式打开 write_npy 生成的文件：不把整个文件读入内存，
+    # 只有访问到的页才从磁盘载入，多个进程打开同一文件时共享操作系统的页缓存
+    # 支持 len()、整数下标（返回单个颜色的字典）和切片（返回 ColorBatch）
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.records = np.load(file_path, mmap_mode="r")
+        names = self.records.dtype.names
+        if self.records.ndim != 1 or names is None:
+            raise ValueError(f"不是本程序生成的 NPY 文件: {file_path}")
+        
+        # 附加色彩空间的列名带有前缀（如 HSL_H），其余为源色彩空间的通道
+        self.extra_fields = [name for name in names if "_" in name]
+        base_names = tuple(name for name in names if "_" not in name)
+        if base_names == ("rgb",):
+            self.color_space = "HEX"
+        else:
+            channels = [name for name in base_names if name != "rgb"]
+            matches = [space for space, channel_names in COLOR_SPACE_CHANNELS.items() if channel_names == channels]
+            if not matches:
+                raise ValueError(f"无法识别 NPY 文件的色彩空间: {file_path}")
+            self.color_space = matches[0]
+        self.channel_names = COLOR_SPACE_CHANNELS[self.color_space]
+        if self.color_space == "RGB":
+            self.fields = ["R", "G", "B", "HEX"]
+        elif self.color_space == "HEX":
+            self.fields = ["HEX", "R", "G", "B"]
+        else:
+            self.fields = self.channel_names + ["R", "G", "B", "HEX"]
+        self.fields = self.fields + self.extra_fields
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        # 释放映射；之后不能再访问
+        mapping = getattr(self.records, "_mmap", None)
+        self.records = None
+        if mapping is not None:
+            mapping.close()
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start = index.indices(len(self))[0]
+            return self.make_batch(start, self.records[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("颜色下标超出范围")
+        batch = self.make_batch(index, self.records[index:index + 1])
+        return next(iter(self.rows(batch)))
+    
+    def make_batch(self, start, records):
+        if self.color_space == "RGB":
+            r, g, b = (np.asarray(records[name]) for name in ("R", "G", "B"))
+            channels = {"R": r, "G": g, "B": b}
+        else:
+            r, g, b = split_rgb(np.asarray(records["rgb"]))
+            if self.color_space == "HEX":
+                channels = {"HEX": np.asarray(records["rgb"])}
+            else:
+                channels = {name: np.asarray(records[name]) for name in self.channel_names}
+        channels.update((name, np.asarray(records[name])) for name in self.extra_fields)
+        return ColorBatch(start, channels, r, g, b, hex_prefix="" if self.color_space == "HEX" else "#")
+    
+    def rows(self, batch):
+        # 以字典形式逐条返回颜色，字段与 CSV 表头一致
+        return (dict(zip(self.fields, row)) for row in batch.rows(self.fields))
+
+
+# 批量导入期间使用的加速设置，以及导入完成后恢复的安全设置
+SQLITE_BULK_PRAGMAS = {"journal_mode": "MEMORY", "synchronous": "OFF", "cache_size": "-262144"}
+SQLITE_SAFE_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "cache_size": "-2000"}
+
+
+def set_sqlite_pragmas(conn, pragmas):
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def sqlite_extra_columns(generator):
+    # 附加列的列名（小写）和类型：色域标记为整数，附加色彩空间的坐标为浮点数
+    return {name.lower(): "INTEGER" if name == GAMUT_FIELD else "REAL" for name in generator.extra_fields}
+
+
+def add_missing_columns(cursor, table, columns):
+    # 附加列按需加入已有的表（旧版本生成的数据库没有这些列），columns 为列名到类型的映射
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for column, column_type in columns.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def create_wide_table(cursor, generator):
+    # 原有的通用宽表：所有色彩空间写入同一张 colors 表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS colors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        color_space TEXT,
+        r INTEGER,
+        g INTEGER,
+        b INTEGER,
+        hex TEXT,
+        h REAL,
+        s REAL,
+        l REAL,
+        hsv_v REAL,
+        c REAL,
+        m REAL,
+        y REAL,
+        k REAL,
+        y_val REAL,
+        u REAL,
+        v REAL,
+        l_val REAL,
+        a REAL,
+        b_val REAL,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    color_space = generator.color_space
+    column_map = dict(SQLITE_COMMON_COLUMNS, **SQLITE_COLUMNS.get(color_space, {}))
+    column_map.update((name, name.lower()) for name in generator.extra_fields)
+    # hsv_v 列是加入 HSV 模式时新增的，旧版本生成的数据库中没有
+    add_missing_columns(cursor, "colors", dict({"hsv_v": "REAL"}, **sqlite_extra_columns(generator)))
+    columns = ["color_space"] + [column_map[name] for name in generator.fields]
+    insert_sql = f"INSERT INTO colors ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    
+    def batch_rows(batch):
+        return zip(
+            itertools.repeat(color_space),
+            *(batch.column(name) for name in generator.fields)
+        )
+    return insert_sql, batch_rows
+
+
+def create_compact_table(cursor, generator, without_rowid=True):
+    # 紧凑表结构：每个色彩空间一张窄表，以坐标为主键，RGB 存为一个 24 位整数
+    color_space = generator.color_space
+    table = f"{color_space.lower()}_colors"
+    if color_space == "HEX":
+        # HEX 的坐标本身就是打包后的 RGB
+        channel_columns = []
+        key_columns = ["rgb"]
+    else:
+        channel_columns = [name.lower() for name in generator.channel_names]
+        key_columns = channel_columns
+    column_type = "REAL" if color_space == "YUV" else "INTEGER"
+    
+    extra_columns = sqlite_extra_columns(generator)
+    column_defs = [f"{name} {column_type} NOT NULL" for name in channel_columns]
+    column_defs.append("rgb INTEGER NOT NULL")
+    column_defs += [f"{name} {extra_type}" for name, extra_type in extra_columns.items()]
+    column_defs.append(f"PRIMARY KEY ({', '.join(key_columns)})")
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(column_defs)})"
+        + (" WITHOUT ROWID" if without_rowid else "")
+    )
+    add_missing_columns(cursor, table, extra_columns)
+    
+    columns = channel_columns + ["rgb"] + list(extra_columns)
+    insert_sql = f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    
+    def batch_rows(batch):
+        channel_values = [] if color_space == "HEX" else [batch.channels[name].tolist() for name in generator.channel_names]
+        extra_values = [batch.channels[name].tolist() for name in generator.extra_fields]
+        return zip(*channel_values, batch.packed_rgb().tolist(), *extra_values)
+    return insert_sql, batch_rows
+
+
+class SQLiteOutput:
+    # write_sqlite 的输出，接口与 OutputFile 相同（供 write_batches 使用）
+    # 每批写完后提交事务，checkpoint 为 True 时再保存断点；批量导入模式只在最后提交
+    # 写入字节数按数据库文件的大小计算
+    def __init__(self, conn, file_path, generator, state, checkpoint=False, bulk=False, telemetry=None):
+        self.conn = conn
+        self.file_path = file_path
+        self.generator = generator
+        self.state = state
+        self.checkpoint = checkpoint
+        self.bulk = bulk
+        self.telemetry = telemetry if telemetry is not None else RunTelemetry()
+        self.rows = state.get("rows", state["completed"])
+    
+    @property
+    def completed(self):
+        return self.state["completed"]
+    
+    def tell(self):
+        return os.path.getsize(self.file_path)
+    
+    def save(self, completed, rows):
+        self.rows = rows
+        if self.checkpoint:
+            self.conn.commit()
+            self.state["completed"] = completed
+            self.state["rows"] = rows
+            if self.state.get("run_id") is None:
+                # 宽表续写时删除最后一次提交之后的行
+                self.state["last_id"] = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM colors").fetchone()[0]
+            save_checkpoint(self.file_path, self.state, self.generator)
+        elif not self.bulk:
+            self.conn.commit()
+
+
+def write_sqlite(generator, file_path, on_progress=None, is_cancelled=None, bulk=False,
+                 schema="wide", without_rowid=True, checkpoint=False, resume=False, telemetry=None):
+    # bulk 为 True 时在单个事务中批量导入，并临时关闭同步写盘
+    # schema 为 "compact" 时使用每个色彩空间一张窄表，并在 generation_runs 中记录本次参数
+    # checkpoint 为 True 时每批提交后保存断点；
+    # 续写时宽表删除断点之后多出的行，紧凑表以坐标为主键，重复写入会被忽略
+    # 批量导入模式关闭了同步写盘，断点可能记录数据库实际没有保存的行，因此不保存断点，也不能续写
+    if bulk and resume:
+        raise ValueError("SQLite 批量导入模式不支持从断点继续生成")
+    checkpoint = checkpoint or resume
+    state = new_checkpoint_state(generator, "SQLite")
+    options = sqlite_checkpoint_options(schema, without_rowid)
+    state.update(options)
+    if resume:
+        saved_state = read_checkpoint(file_path)
+        check_checkpoint(saved_state, generator, "SQLite", **options)
+        state.update(saved_state)
+        restore_generator_state(file_path, generator, state)
+    elif checkpoint:
+        remove_checkpoint(file_path)
+    if bulk:
+        checkpoint = False
+    
+    conn = sqlite3.connect(file_path)
+    cursor = conn.cursor()
+    if bulk:
+        set_sqlite_pragmas(conn, SQLITE_BULK_PRAGMAS)
+    
+    # 创建表
+    run_id = None
+    if schema == "compact":
+        insert_sql, batch_rows = create_compact_table(cursor, generator, without_rowid)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS generation_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            color_space TEXT,
+            parameters TEXT,
+            total_colors INTEGER,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        if resume:
+            run_id = state["run_id"]
+        else:
+            cursor.execute(
+                "INSERT INTO generation_runs (color_space, parameters) VALUES (?, ?)",
+                (generator.color_space, json.dumps(generator.parameters()))
+            )
+            run_id = cursor.lastrowid
+        state["run_id"] = run_id
+    else:
+        insert_sql, batch_rows = create_wide_table(cursor, generator)
+        if resume:
+            # 删除最后一次提交之后的残留行，并让自增 id 接着断点继续
+            last_id = state["last_id"]
+            if cursor.execute("SELECT COALESCE(MAX(id), 0) FROM colors").fetchone()[0] < last_id:
+                raise ValueError("数据库内容比断点记录的少，无法继续生成")
+            cursor.execute("DELETE FROM colors WHERE id > ?", (last_id,))
+            cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'colors'", (last_id,))
+    
+    output = SQLiteOutput(conn, file_path, generator, state, checkpoint, bulk, telemetry)
+    try:
+        completed = write_batches(output, batch_rows, lambda rows: cursor.executemany(insert_sql, rows),
+                                  on_progress=on_progress, is_cancelled=is_cancelled, with_hex=schema == "wide")
+        
+        if run_id is not None:
+            cursor.execute("UPDATE generation_runs SET total_colors = ? WHERE id = ?", (output.rows, run_id))
+        conn.commit()
+        if bulk:
+            set_sqlite_pragmas(conn, SQLITE_SAFE_PRAGMAS)
+    finally:
+        conn.close()
+    if completed and checkpoint:
+        remove_checkpoint(file_path)
+    return completed
+
+
+# 输出格式对应的写入函数
+WRITERS = {
+    "CSV": write_csv,
+    "JSON": write_json,
+    "NDJSON": write_ndjson,
+    "NPY": write_npy,
+    "SQLite": write_sqlite,
+}
+
+
+# ===================== RGB 立方体反查表 =====================
+
+# 可以生成反查表的色彩空间
+REVERSE_TABLE_SPACES = ("HSL", "HSV", "CMYK", "YUV", "Lab")
+# 反向转换内核改变时递增，旧的反查表会重新生成
+REVERSE_TABLE_VERSION = 1
+
+
+def reverse_table_path(table_dir, color_space):
+    return os.path.join(table_dir, f"rgb_to_{color_space.lower()}.npy")
+
+
+def build_reverse_tables(table_dir, spaces=REVERSE_TABLE_SPACES, chunk_size=CHUNK_SIZE,
+                         on_progress=None, is_cancelled=None):
+    # 一次性计算全部 16,777,216 种 RGB 颜色在各色彩空间中的坐标。
+    # 每个色彩空间一个 float32 的 .npy 文件（形状为 颜色数 × 通道数），第 n 行对应打包值为 n 的 RGB；
+    # 文件以内存映射方式逐块写入，每块完成后把进度写入 manifest.json，中断后再次调用会从断点继续。
+    # 返回 True 表示全部完成，False 表示被取消
+    for space in spaces:
+        if space not in REVERSE_TABLE_SPACES:
+            raise ValueError(f"不支持反向转换到色彩空间: {space}")
+    os.makedirs(table_dir, exist_ok=True)
+    manifest_path = os.path.join(table_dir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    if manifest.get("version") != REVERSE_TABLE_VERSION:
+        manifest = {"version": REVERSE_TABLE_VERSION, "spaces": {}}
+    
+    tables = {}
+    for space in spaces:
+        path = reverse_table_path(table_dir, space)
+        entry = manifest["spaces"].get(space)
+        if entry is not None and os.path.exists(path):
+            tables[space] = np.lib.format.open_memmap(path, mode="r+")
+        else:
+            channels = COLOR_SPACE_CHANNELS[space]
+            tables[space] = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float32, shape=(RGB_CUBE_SIZE, len(channels))
+            )
+            manifest["spaces"][space] = {"file": os.path.basename(path), "channels": channels, "completed": 0}
+    write_json_atomic(manifest_path, manifest)
+    
+    entries = [manifest["spaces"][space] for space in spaces]
+    start = min((entry["completed"] for entry in entries), default=RGB_CUBE_SIZE)
+    for chunk_start in range(start, RGB_CUBE_SIZE, chunk_size):
+        if is_cancelled and is_cancelled():
+            return False
+        
+        chunk_stop = min(chunk_start + chunk_size, RGB_CUBE_SIZE)
+        r, g, b = split_rgb(np.arange(chunk_start, chunk_stop))
+        for space, entry in zip(spaces, entries):
+            if entry["completed"] >= chunk_stop:
+                continue
+            tables[space][chunk_start:chunk_stop] = np.stack(rgb_to_color_space(space, r, g, b), axis=-1)
+            tables[space].flush()
+            entry["completed"] = chunk_stop
+        write_json_atomic(manifest_path, manifest)
+        if on_progress:
+            on_progress(chunk_stop, RGB_CUBE_SIZE)
+    return True
+
+
+class ReverseTables:
+    # 以只读内存映射打开 build_reverse_tables 生成的反查表，按打包后的 RGB 值直接取坐标
+    def __init__(self, table_dir):
+        with open(os.path.join(table_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        self.tables = {}
+        self.channels = {}
+        for space, entry in manifest.get("spaces", {}).items():
+            # 未生成完成的表不可用
+            if entry["completed"] >= RGB_CUBE_SIZE:
+                self.tables[space] = np.load(os.path.join(table_dir, entry["file"]), mmap_mode="r")
+                self.channels[space] = entry["channels"]
+    
+    @property
+    def spaces(self):
+        return list(self.tables)
+    
+    def lookup(self, color_space, rgb):
+        # rgb 为打包后的 RGB 整数（或数组），也可以是 "#RRGGBB" 字符串；返回对应的各通道坐标
+        if color_space not in self.tables:
+            raise ValueError(f"反查表中没有 {color_space}，或尚未生成完成")
+        if isinstance(rgb, str):
+            rgb = int(rgb.lstrip("#"), 16)
+        return self.tables[color_space][rgb]
+
 
 class ColorSpaceGeneratorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("多色彩空间数值生成器")
         
-        # 设置窗口大小和位置
+        # 设置窗口大小和位置（高度要容纳 4 行参数的色彩空间和高级选项，底部的按钮不能被裁掉）
         window_width = 550
-        window_height = 650
+        window_height = 720
         screen_width = root.winfo_screenwidth()
         screen_height = root.winfo_screenheight()
         center_x = int(screen_width/2 - window_width/2)
@@ -29,6 +2156,12 @@ class ColorSpaceGeneratorApp:
         # 用于跟踪生成进度
         self.generating = False
         self.current_progress = 0
+        # 本次生成是否保存断点（决定停止后的提示）
+        self.checkpointing = False
+        # 工作线程通过队列发送进度事件，通过 Event 接收取消请求
+        self.progress_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
         
         # 默认色彩空间
         self.color_space = "RGB"
@@ -63,7 +2196,7 @@ class ColorSpaceGeneratorApp:
         output_format_frame.pack(pady=5, padx=10, fill=tk.X)
         
         self.output_format_var = tk.StringVar(value="CSV")
-        output_formats = ["CSV", "JSON", "SQLite"]
+        output_formats = ["CSV", "JSON", "NDJSON", "NPY", "SQLite"]
         
         for i, fmt in enumerate(output_formats):
             rb = tk.Radiobutton(
@@ -75,17 +2208,39 @@ class ColorSpaceGeneratorApp:
             )
             rb.grid(row=0, column=i, padx=5, pady=5)
         
+        self.sqlite_bulk_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            output_format_frame,
+            text="SQLite 批量导入（单事务，更快，不保存断点）",
+            variable=self.sqlite_bulk_var,
+            font=("Microsoft YaHei", 9)
+        ).grid(row=1, column=0, columnspan=len(output_formats), sticky=tk.W, padx=5)
+        
+        sqlite_schema_frame = tk.Frame(output_format_frame)
+        sqlite_schema_frame.grid(row=2, column=0, columnspan=len(output_formats), sticky=tk.W, padx=5)
+        self.sqlite_compact_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            sqlite_schema_frame,
+            text="SQLite 紧凑表结构（每个色彩空间一张表）",
+            variable=self.sqlite_compact_var,
+            font=("Microsoft YaHei", 9)
+        ).pack(side=tk.LEFT)
+        # 紧凑表以坐标为主键，默认不再保留 rowid
+        self.sqlite_without_rowid_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            sqlite_schema_frame,
+            text="WITHOUT ROWID",
+            variable=self.sqlite_without_rowid_var,
+            font=("Microsoft YaHei", 9)
+        ).pack(side=tk.LEFT)
+        
         # 参数输入区域
         self.params_frame = tk.LabelFrame(self.root, text="参数设置", font=("Microsoft YaHei", 10))
         self.params_frame.pack(pady=5, padx=10, fill=tk.BOTH, expand=True)
         
-        # 创建各色彩空间的输入字段
-        self.create_rgb_fields()
-        self.create_hsl_fields()
-        self.create_cmyk_fields()
-        self.create_yuv_fields()
-        self.create_lab_fields()
-        self.create_hex_fields()
+        # 各色彩空间的输入字段在第一次选中时才创建
+        self.rgb_frame = self.hsl_frame = self.cmyk_frame = None
+        self.yuv_frame = self.lab_frame = self.hex_frame = None
         
         # 默认显示RGB字段
         self.show_rgb_fields()
@@ -97,6 +2252,80 @@ class ColorSpaceGeneratorApp:
         self.step = tk.Entry(step_frame, width=5)
         self.step.pack(side=tk.LEFT, padx=5)
         self.step.insert(0, "1")
+        tk.Label(step_frame, text="并行进程数:", font=("Microsoft YaHei", 10)).pack(side=tk.LEFT, padx=(10, 0))
+        self.workers = tk.Entry(step_frame, width=5)
+        self.workers.pack(side=tk.LEFT, padx=5)
+        self.workers.insert(0, "1")
+        
+        # 高级选项：按两列排列，减少占用的行数
+        options_frame = tk.LabelFrame(self.root, text="高级选项", font=("Microsoft YaHei", 10))
+        options_frame.pack(pady=5, padx=10, fill=tk.X)
+        
+        # 多色彩空间输出
+        self.all_spaces_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame,
+            text="同时输出所有色彩空间的坐标",
+            variable=self.all_spaces_var,
+            font=("Microsoft YaHei", 9)
+        ).grid(row=0, column=0, sticky=tk.W, padx=5)
+        
+        # RGB 去重（每种颜色保留第一次出现的行）
+        self.unique_rgb_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame,
+            text="只输出不重复的 RGB 颜色",
+            variable=self.unique_rgb_var,
+            font=("Microsoft YaHei", 9)
+        ).grid(row=0, column=1, sticky=tk.W, padx=5)
+        
+        # Lab/YUV 中超出 sRGB 色域的点
+        gamut_frame = tk.Frame(options_frame)
+        gamut_frame.grid(row=1, column=0, columnspan=2, sticky=tk.W, padx=5)
+        tk.Label(gamut_frame, text="Lab/YUV 色域外的点:", font=("Microsoft YaHei", 9)).pack(side=tk.LEFT)
+        self.out_of_gamut_var = tk.StringVar(value="keep")
+        for mode, text in (("keep", "保留（截断）"), ("drop", "去掉"), ("flag", "标记")):
+            tk.Radiobutton(
+                gamut_frame,
+                text=text,
+                variable=self.out_of_gamut_var,
+                value=mode,
+                font=("Microsoft YaHei", 9)
+            ).pack(side=tk.LEFT)
+        
+        # Lab/CMYK 转换结果缓存（重复生成重叠范围时更快）
+        self.lut_cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame,
+            text="缓存 Lab/CMYK 转换结果",
+            variable=self.lut_cache_var,
+            font=("Microsoft YaHei", 9)
+        ).grid(row=2, column=0, sticky=tk.W, padx=5)
+        
+        # 运行报告之外，是否把每批的进度事件记录到日志
+        self.events_log_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame,
+            text="记录事件日志（.events.jsonl）",
+            variable=self.events_log_var,
+            font=("Microsoft YaHei", 9)
+        ).grid(row=2, column=1, sticky=tk.W, padx=5)
+        
+        # 性能分析：在工作线程中用 cProfile 运行本次生成，可选同时统计内存分配
+        self.profile_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame,
+            text="性能分析（保存 .prof 和摘要）",
+            variable=self.profile_var,
+            font=("Microsoft YaHei", 9)
+        ).grid(row=3, column=0, sticky=tk.W, padx=5)
+        self.trace_memory_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame,
+            text="同时统计内存分配（较慢）",
+            variable=self.trace_memory_var,
+            font=("Microsoft YaHei", 9)
+        ).grid(row=3, column=1, sticky=tk.W, padx=5)
         
         # 进度条
         self.progress_frame = tk.Frame(self.root)
@@ -118,13 +2347,13 @@ class ColorSpaceGeneratorApp:
         self.progress_bar.pack()
         
         # 生成按钮
-        generate_btn = tk.Button(
+        self.generate_btn = tk.Button(
             self.root, 
             text="生成文件", 
             font=("Microsoft YaHei", 12), 
             command=self.start_generation
         )
-        generate_btn.pack(pady=10)
+        self.generate_btn.pack(pady=10)
         
         # 停止按钮
         self.stop_btn = tk.Button(
@@ -213,6 +2442,20 @@ class ColorSpaceGeneratorApp:
         self.l_max.pack(side=tk.LEFT, padx=5)
         self.l_min.insert(0, "0")
         self.l_max.insert(0, "100")
+        
+        # 模式选择
+        mode_frame = tk.Frame(self.hsl_frame)
+        mode_frame.pack(pady=5, fill=tk.X)
+        tk.Label(mode_frame, text="模式:", font=("Microsoft YaHei", 10)).pack(side=tk.LEFT)
+        self.hsl_mode_var = tk.StringVar(value="HSL")
+        for mode in ["HSL", "HSV"]:
+            tk.Radiobutton(
+                mode_frame,
+                text=mode,
+                variable=self.hsl_mode_var,
+                value=mode,
+                font=("Microsoft YaHei", 9)
+            ).pack(side=tk.LEFT, padx=5)
     
     def create_cmyk_fields(self):
         self.cmyk_frame = tk.Frame(self.params_frame)
@@ -303,6 +2546,14 @@ class ColorSpaceGeneratorApp:
         self.v_max.pack(side=tk.LEFT, padx=5)
         self.v_min.insert(0, "-0.5")
         self.v_max.insert(0, "0.5")
+        
+        # YUV 步长设置
+        yuv_step_frame = tk.Frame(self.yuv_frame)
+        yuv_step_frame.pack(pady=5, fill=tk.X)
+        tk.Label(yuv_step_frame, text="YUV 步长:", font=("Microsoft YaHei", 10)).pack(side=tk.LEFT)
+        self.yuv_step = tk.Entry(yuv_step_frame, width=5)
+        self.yuv_step.pack(side=tk.LEFT, padx=5)
+        self.yuv_step.insert(0, "0.01")
     
     def create_lab_fields(self):
         self.lab_frame = tk.Frame(self.params_frame)
@@ -362,34 +2613,35 @@ class ColorSpaceGeneratorApp:
         self.hex_end.pack(side=tk.LEFT, padx=5)
         self.hex_end.insert(0, "FFFFFF")
     
-    def show_rgb_fields(self):
+    def show_fields(self, frame_name, create_fields):
         self.hide_all_fields()
-        self.rgb_frame.pack(fill=tk.BOTH, expand=True)
+        if getattr(self, frame_name) is None:
+            create_fields()
+        getattr(self, frame_name).pack(fill=tk.BOTH, expand=True)
+    
+    def show_rgb_fields(self):
+        self.show_fields("rgb_frame", self.create_rgb_fields)
     
     def show_hsl_fields(self):
-        self.hide_all_fields()
-        self.hsl_frame.pack(fill=tk.BOTH, expand=True)
+        self.show_fields("hsl_frame", self.create_hsl_fields)
     
     def show_cmyk_fields(self):
-        self.hide_all_fields()
-        self.cmyk_frame.pack(fill=tk.BOTH, expand=True)
+        self.show_fields("cmyk_frame", self.create_cmyk_fields)
     
     def show_yuv_fields(self):
-        self.hide_all_fields()
-        self.yuv_frame.pack(fill=tk.BOTH, expand=True)
+        self.show_fields("yuv_frame", self.create_yuv_fields)
     
     def show_lab_fields(self):
-        self.hide_all_fields()
-        self.lab_frame.pack(fill=tk.BOTH, expand=True)
+        self.show_fields("lab_frame", self.create_lab_fields)
     
     def show_hex_fields(self):
-        self.hide_all_fields()
-        self.hex_frame.pack(fill=tk.BOTH, expand=True)
+        self.show_fields("hex_frame", self.create_hex_fields)
     
     def hide_all_fields(self):
         for frame in [self.rgb_frame, self.hsl_frame, self.cmyk_frame, 
                      self.yuv_frame, self.lab_frame, self.hex_frame]:
-            frame.pack_forget()
+            if frame is not None:
+                frame.pack_forget()
     
     def update_input_fields(self):
         color_space = self.color_space_var.get()
@@ -419,11 +2671,7 @@ class ColorSpaceGeneratorApp:
                 b_min = int(self.b_min.get())
                 b_max = int(self.b_max.get())
                 
-                if (r_min < 0 or r_max < 0 or g_min < 0 or g_max < 0 or b_min < 0 or b_max < 0 or
-                    r_min > 255 or r_max > 255 or g_min > 255 or g_max > 255 or b_min > 255 or b_max > 255):
-                    raise ValueError("RGB 值必须在 0-255 之间")
-                
-                return True, ("RGB", r_min, r_max, g_min, g_max, b_min, b_max)
+                space, ranges = "RGB", [(r_min, r_max), (g_min, g_max), (b_min, b_max)]
             
             elif color_space == "HSL/HSV":
                 h_min = int(self.h_min.get())
@@ -433,11 +2681,7 @@ class ColorSpaceGeneratorApp:
                 l_min = int(self.l_min.get())
                 l_max = int(self.l_max.get())
                 
-                if (h_min < 0 or h_max < 0 or s_min < 0 or s_max < 0 or l_min < 0 or l_max < 0 or
-                    h_min > 360 or h_max > 360 or s_min > 100 or s_max > 100 or l_min > 100 or l_max > 100):
-                    raise ValueError("H 范围 0-360, S/L 范围 0-100")
-                
-                return True, ("HSL", h_min, h_max, s_min, s_max, l_min, l_max)
+                space, ranges = self.hsl_mode_var.get(), [(h_min, h_max), (s_min, s_max), (l_min, l_max)]
             
             elif color_space == "CMYK":
                 c_min = int(self.c_min.get())
@@ -449,13 +2693,7 @@ class ColorSpaceGeneratorApp:
                 k_min = int(self.k_min.get())
                 k_max = int(self.k_max.get())
                 
-                if (c_min < 0 or c_max < 0 or m_min < 0 or m_max < 0 or 
-                    y_min < 0 or y_max < 0 or k_min < 0 or k_max < 0 or
-                    c_min > 100 or c_max > 100 or m_min > 100 or m_max > 100 or 
-                    y_min > 100 or y_max > 100 or k_min > 100 or k_max > 100):
-                    raise ValueError("CMYK 值必须在 0-100 之间")
-                
-                return True, ("CMYK", c_min, c_max, m_min, m_max, y_min, y_max, k_min, k_max)
+                space, ranges = "CMYK", [(c_min, c_max), (m_min, m_max), (y_min, y_max), (k_min, k_max)]
             
             elif color_space == "YUV":
                 y_min = float(self.y_min_yuv.get())
@@ -464,13 +2702,9 @@ class ColorSpaceGeneratorApp:
                 u_max = float(self.u_max.get())
                 v_min = float(self.v_min.get())
                 v_max = float(self.v_max.get())
+                yuv_step = float(self.yuv_step.get())
                 
-                if (y_min < 0 or y_max < 0 or y_min > 1 or y_max > 1 or
-                    u_min < -0.5 or u_max < -0.5 or u_min > 0.5 or u_max > 0.5 or
-                    v_min < -0.5 or v_max < -0.5 or v_min > 0.5 or v_max > 0.5):
-                    raise ValueError("Y 范围 0-1, U/V 范围 -0.5-0.5")
-                
-                return True, ("YUV", y_min, y_max, u_min, u_max, v_min, v_max)
+                space, ranges = "YUV", [(y_min, y_max), (u_min, u_max), (v_min, v_max)]
             
             elif color_space == "Lab":
                 l_min = int(self.l_min_lab.get())
@@ -480,39 +2714,35 @@ class ColorSpaceGeneratorApp:
                 b_min = int(self.b_min_lab.get())
                 b_max = int(self.b_max_lab.get())
                 
-                if (l_min < 0 or l_max < 0 or l_min > 100 or l_max > 100 or
-                    a_min < -128 or a_max < -128 or a_min > 127 or a_max > 127 or
-                    b_min < -128 or b_max < -128 or b_min > 127 or b_max > 127):
-                    raise ValueError("L 范围 0-100, a/b 范围 -128-127")
-                
-                return True, ("Lab", l_min, l_max, a_min, a_max, b_min, b_max)
+                space, ranges = "Lab", [(l_min, l_max), (a_min, a_max), (b_min, b_max)]
             
             elif color_space == "HEX":
                 hex_start = self.hex_start.get().strip().upper()
                 hex_end = self.hex_end.get().strip().upper()
                 
-                if len(hex_start) != 6 or len(hex_end) != 6:
-                    raise ValueError("HEX 值必须是6位字符")
-                
-                try:
-                    int(hex_start, 16)
-                    int(hex_end, 16)
-                except ValueError:
-                    raise ValueError("HEX 值必须是有效的十六进制数")
-                
-                return True, ("HEX", hex_start, hex_end)
+                space, ranges = "HEX", [(hex_start, hex_end)]
             
-            step = int(self.step.get())
-            if step <= 0:
-                raise ValueError("步长必须大于 0")
-                
-            return True, None
+            step = yuv_step if space == "YUV" else int(self.step.get())
+            validate_parameters(space, ranges, step)
+            
+            workers = int(self.workers.get())
+            if workers < 1:
+                raise ValueError("并行进程数必须大于 0")
+            
+            cache = ConversionCache() if self.lut_cache_var.get() and space in LUT_CACHE_SPACES else None
+            extra_spaces = EXTRA_SPACES if self.all_spaces_var.get() else ()
+            return True, ColorSpaceGenerator(space, ranges, step, workers=workers, cache=cache,
+                                             extra_spaces=extra_spaces, unique_rgb=self.unique_rgb_var.get(),
+                                             out_of_gamut=self.out_of_gamut_var.get())
+        except OSError as e:
+            messagebox.showerror("错误", f"无法创建缓存目录:\n{e}")
+            return False, None
         except ValueError as e:
             messagebox.showerror("输入错误", str(e))
             return False, None
     
     def start_generation(self):
-        valid, values = self.validate_inputs()
+        valid, generator = self.validate_inputs()
         if not valid:
             return
         
@@ -524,6 +2754,12 @@ class ColorSpaceGeneratorApp:
         elif output_format == "JSON":
             filetypes = [("JSON 文件", "*.json"), ("所有文件", "*.*")]
             defaultext = ".json"
+        elif output_format == "NDJSON":
+            filetypes = [("NDJSON 文件", "*.ndjson *.jsonl"), ("所有文件", "*.*")]
+            defaultext = ".ndjson"
+        elif output_format == "NPY":
+            filetypes = [("NumPy 数组", "*.npy"), ("所有文件", "*.*")]
+            defaultext = ".npy"
         else:  # SQLite
             filetypes = [("SQLite 数据库", "*.db"), ("所有文件", "*.*")]
             defaultext = ".db"
@@ -538,705 +2774,500 @@ class ColorSpaceGeneratorApp:
         if not file_path:
             return  # 用户取消了保存
         
+        # 界面生成时保存断点，以便停止或崩溃后继续（SQLite 批量导入模式除外）
+        writer_options = {"checkpoint": True}
+        if output_format == "SQLite":
+            writer_options["bulk"] = self.sqlite_bulk_var.get()
+            writer_options["schema"] = "compact" if self.sqlite_compact_var.get() else "wide"
+            writer_options["without_rowid"] = self.sqlite_without_rowid_var.get()
+            writer_options["checkpoint"] = not writer_options["bulk"]
+        
+        # 同一输出文件有未完成的生成记录且参数一致时，询问是否从断点继续
+        state = read_checkpoint(file_path) if writer_options["checkpoint"] else None
+        if state is not None:
+            try:
+                if output_format == "SQLite":
+                    check_checkpoint(state, generator, output_format, **sqlite_checkpoint_options(
+                        writer_options["schema"], writer_options["without_rowid"]))
+                else:
+                    check_checkpoint(state, generator, output_format)
+            except ValueError:
+                state = None
+        if state is not None:
+            answer = messagebox.askyesnocancel(
+                "继续生成",
+                f"检测到该文件有未完成的生成记录（已完成 {state['completed']} / {state['total']} 条）。\n\n"
+                "选择“是”从断点继续，选择“否”重新生成。"
+            )
+            if answer is None:
+                return
+            writer_options["resume"] = answer
+        
         # 准备生成
         self.generating = True
         self.current_progress = 0
+        self.checkpointing = writer_options["checkpoint"]
+        self.cancel_event.clear()
+        self.generate_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
-        self.progress_bar["value"] = 0
-        self.progress_label.config(text="正在生成... 0%")
-        self.root.update()
+        progress = state["completed"] / state["total"] * 100 if writer_options.get("resume") else 0
+        self.progress_bar["value"] = progress
+        self.progress_label.config(text=f"正在生成... {progress:.1f}%")
         
-        # 在后台线程中生成文件
-        self.root.after(100, lambda: self.generate_file(file_path, output_format, *values))
+        # 在后台线程中生成文件，界面定时轮询进度
+        self.worker = threading.Thread(
+            target=self.generate_file,
+            args=(file_path, output_format, generator, writer_options),
+            kwargs={
+                "events_log": self.events_log_var.get(),
+                "profile": self.profile_var.get() or self.trace_memory_var.get(),
+                "trace_memory": self.trace_memory_var.get(),
+            },
+            daemon=True
+        )
+        self.worker.start()
+        self.root.after(POLL_INTERVAL_MS, self.poll_progress)
     
     def stop_generation(self):
-        self.generating = False
-        self.progress_label.config(text="生成已停止")
+        self.cancel_event.set()
+        self.progress_label.config(text="正在停止...")
         self.stop_btn.config(state=tk.DISABLED)
     
-    def update_progress(self, progress):
+    def update_progress(self, progress, stats=None):
         self.progress_bar["value"] = progress
-        self.progress_label.config(text=f"正在生成... {progress:.1f}%")
-        self.root.update()
+        text = f"正在生成... {progress:.1f}%"
+        if stats is not None:
+            text += f"（{progress_text(stats)}）"
+        self.progress_label.config(text=text)
     
-    def generate_file(self, file_path, output_format, color_space, *args):
-        try:
-            if output_format == "CSV":
-                self.generate_csv(file_path, color_space, *args)
-            elif output_format == "JSON":
-                self.generate_json(file_path, color_space, *args)
-            elif output_format == "SQLite":
-                self.generate_sqlite(file_path, color_space, *args)
+    def poll_progress(self):
+        # 在主线程中处理工作线程发来的事件
+        while True:
+            try:
+                event = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
             
-            if self.generating:
-                messagebox.showinfo("成功", f"文件已成功生成并保存到:\n{file_path}")
-                self.progress_label.config(text="生成完成!")
-                self.stop_btn.config(state=tk.DISABLED)
-                self.generating = False
-        except Exception as e:
-            messagebox.showerror("错误", f"生成文件时出错:\n{str(e)}")
+            kind = event[0]
+            if kind == "progress":
+                self.update_progress(*event[1:])
+            elif kind == "done":
+                self.finish_generation(*event[1:])
+            elif kind == "error":
+                self.finish_generation(False, error=event[1])
+        
+        if self.generating:
+            self.root.after(POLL_INTERVAL_MS, self.poll_progress)
+    
+    def finish_generation(self, completed, file_path=None, grid_total=0, error=None, cache_stats=None,
+                          unique_stats=None, gamut_stats=None, run_stats=None, profile_file=None):
+        # 耗时和速度取自 run_stats，只计本次运行（断点续写时不含之前写入的行）
+        self.generating = False
+        self.worker = None
+        self.stop_btn.config(state=tk.DISABLED)
+        self.generate_btn.config(state=tk.NORMAL)
+        
+        if error is not None:
+            messagebox.showerror("错误", f"生成文件时出错:\n{error}")
             self.progress_label.config(text="生成出错!")
-            self.stop_btn.config(state=tk.DISABLED)
-            self.generating = False
+        elif not completed:
+            if self.checkpointing:
+                self.progress_label.config(text="生成已停止（再次生成同一文件时可从断点继续）")
+            else:
+                self.progress_label.config(text="生成已停止，输出文件不完整")
+        else:
+            self.update_progress(100)
+            self.progress_label.config(text="生成完成!")
+            message = (
+                f"文件已成功生成并保存到:\n{file_path}\n\n"
+                f"{rows_text(run_stats, grid_total)}，耗时 {run_stats['elapsed']:.1f} 秒，{run_stats['rows_per_sec']:,.0f} 行/秒"
+            )
+            if gamut_stats:
+                action = "去掉" if gamut_stats["mode"] == "drop" else "标记"
+                message += (f"\n超出 sRGB 色域：{action} {gamut_stats['out_of_gamut']} 个点"
+                            f"（占 {gamut_stats['out_of_gamut_rate']:.1%}）")
+            if unique_stats:
+                message += (f"\n去重后输出 {unique_stats['unique']} 种颜色，跳过重复 {unique_stats['duplicates']} 条"
+                            f"（重复率 {unique_stats['duplicate_rate']:.1%}）")
+            message += (f"\n写入 {format_bytes(run_stats['bytes'])}（{format_bytes(run_stats['bytes_per_sec'])}/秒）"
+                        f"\n各阶段耗时：{stages_text(run_stats)}")
+            if profile_file:
+                message += f"\n性能分析摘要：{profile_file}"
+            if cache_stats:
+                message += f"\n转换缓存：命中 {cache_stats['hits']} 块，未命中 {cache_stats['misses']} 块"
+            messagebox.showinfo("成功", message)
     
-    def generate_csv(self, file_path, color_space, *args):
-        with open(file_path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            if color_space == "RGB":
-                writer.writerow(["R", "G", "B", "HEX"])
-                r_min, r_max, g_min, g_max, b_min, b_max = args
-                step = int(self.step.get())
-                
-                total_combinations = ((r_max - r_min + 1) // step) * ((g_max - g_min + 1) // step) * ((b_max - b_min + 1) // step)
-                current_count = 0
-                
-                for r in range(r_min, r_max + 1, step):
-                    for g in range(g_min, g_max + 1, step):
-                        for b in range(b_min, b_max + 1, step):
-                            if not self.generating:
-                                return
-                            
-                            writer.writerow([r, g, b, f"#{r:02X}{g:02X}{b:02X}"])
-                            current_count += 1
-                            
-                            if current_count % 1000 == 0 or current_count == total_combinations:
-                                progress = (current_count / total_combinations) * 100
-                                self.update_progress(progress)
-            
-            elif color_space == "HSL":
-                writer.writerow(["H", "S", "L", "R", "G", "B", "HEX"])
-                h_min, h_max, s_min, s_max, l_min, l_max = args
-                step = int(self.step.get())
-                
-                total_combinations = ((h_max - h_min + 1) // step) * ((s_max - s_min + 1) // step) * ((l_max - l_min + 1) // step)
-                current_count = 0
-                
-                for h in range(h_min, h_max + 1, step):
-                    for s in range(s_min, s_max + 1, step):
-                        for l_val in range(l_min, l_max + 1, step):
-                            if not self.generating:
-                                return
-                            
-                            rgb = colorsys.hls_to_rgb(h/360, l_val/100, s/100)
-                            r, g, b = [round(x*255) for x in rgb]
-                            writer.writerow([h, s, l_val, r, g, b, f"#{r:02X}{g:02X}{b:02X}"])
-                            current_count += 1
-                            
-                            if current_count % 1000 == 0 or current_count == total_combinations:
-                                progress = (current_count / total_combinations) * 100
-                                self.update_progress(progress)
-            
-            elif color_space == "CMYK":
-                writer.writerow(["C", "M", "Y", "K", "R", "G", "B", "HEX"])
-                c_min, c_max, m_min, m_max, y_min, y_max, k_min, k_max = args
-                step = int(self.step.get())
-                
-                total_combinations = ((c_max - c_min + 1) // step) * ((m_max - m_min + 1) // step) * ((y_max - y_min + 1) // step) * ((k_max - k_min + 1) // step)
-                current_count = 0
-                
-                for c in range(c_min, c_max + 1, step):
-                    for m in range(m_min, m_max + 1, step):
-                        for y in range(y_min, y_max + 1, step):
-                            for k in range(k_min, k_max + 1, step):
-                                if not self.generating:
-                                    return
-                                
-                                cmyk = CMYKColor(c/100, m/100, y/100, k/100)
-                                rgb = convert_color(cmyk, sRGBColor)
-                                r, g, b = [round(x*255) for x in rgb.get_value_tuple()]
-                                writer.writerow([c, m, y, k, r, g, b, f"#{r:02X}{g:02X}{b:02X}"])
-                                current_count += 1
-                                
-                                if current_count % 1000 == 0 or current_count == total_combinations:
-                                    progress = (current_count / total_combinations) * 100
-                                    self.update_progress(progress)
-            
-            elif color_space == "YUV":
-                writer.writerow(["Y", "U", "V", "R", "G", "B", "HEX"])
-                y_min, y_max, u_min, u_max, v_min, v_max = args
-                step = 0.01  # YUV使用固定步长
-                
-                total_combinations = int((y_max - y_min) / step) * int((u_max - u_min) / step) * int((v_max - v_min) / step)
-                current_count = 0
-                
-                y_val = y_min
-                while y_val <= y_max:
-                    u_val = u_min
-                    while u_val <= u_max:
-                        v_val = v_min
-                        while v_val <= v_max:
-                            if not self.generating:
-                                return
-                            
-                            # 转换为RGB
-                            r = y_val + 1.4075 * (v_val - 0.5)
-                            g = y_val - 0.3455 * (u_val - 0.5) - 0.7169 * (v_val - 0.5)
-                            b = y_val + 1.7790 * (u_val - 0.5)
-                            
-                            r = max(0, min(1, r))
-                            g = max(0, min(1, g))
-                            b = max(0, min(1, b))
-                            
-                            r, g, b = [round(x*255) for x in (r, g, b)]
-                            writer.writerow([round(y_val, 2), round(u_val, 2), round(v_val, 2), r, g, b, f"#{r:02X}{g:02X}{b:02X}"])
-                            current_count += 1
-                            
-                            if current_count % 1000 == 0 or current_count == total_combinations:
-                                progress = (current_count / total_combinations) * 100
-                                self.update_progress(progress)
-                            
-                            v_val += step
-                        u_val += step
-                    y_val += step
-            
-            elif color_space == "Lab":
-                writer.writerow(["L", "a", "b", "R", "G", "B", "HEX"])
-                l_min, l_max, a_min, a_max, b_min, b_max = args
-                step = int(self.step.get())
-                
-                total_combinations = ((l_max - l_min + 1) // step) * ((a_max - a_min + 1) // step) * ((b_max - b_min + 1) // step)
-                current_count = 0
-                
-                for l_val in range(l_min, l_max + 1, step):
-                    for a_val in range(a_min, a_max + 1, step):
-                        for b_val in range(b_min, b_max + 1, step):
-                            if not self.generating:
-                                return
-                            
-                            lab = LabColor(l_val, a_val, b_val)
-                            rgb = convert_color(lab, sRGBColor)
-                            r, g, b = [round(x*255) for x in rgb.get_value_tuple()]
-                            writer.writerow([l_val, a_val, b_val, r, g, b, f"#{r:02X}{g:02X}{b:02X}"])
-                            current_count += 1
-                            
-                            if current_count % 1000 == 0 or current_count == total_combinations:
-                                progress = (current_count / total_combinations) * 100
-                                self.update_progress(progress)
-            
-            elif color_space == "HEX":
-                writer.writerow(["HEX", "R", "G", "B"])
-                hex_start, hex_end = args
-                step = int(self.step.get())
-                
-                start_val = int(hex_start, 16)
-                end_val = int(hex_end, 16)
-                
-                if start_val > end_val:
-                    start_val, end_val = end_val, start_val
-                
-                total_combinations = (end_val - start_val + 1) // step
-                current_count = 0
-                
-                for val in range(start_val, end_val + 1, step):
-                    if not self.generating:
-                        return
-                    
-                    hex_str = f"{val:06X}"
-                    r = int(hex_str[0:2], 16)
-                    g = int(hex_str[2:4], 16)
-                    b = int(hex_str[4:6], 16)
-                    writer.writerow([hex_str, r, g, b])
-                    current_count += 1
-                    
-                    if current_count % 1000 == 0 or current_count == total_combinations:
-                        progress = ((val - start_val) / (end_val - start_val)) * 100
-                        self.update_progress(progress)
-    
-    def generate_json(self, file_path, color_space, *args):
-        color_data = []
+    def generate_file(self, file_path, output_format, generator, writer_options, events_log=False, profile=False,
+                      trace_memory=False):
+        # 在工作线程中运行，只通过队列与界面通信；结束后在输出文件旁写入运行报告
+        # events_log 为 True 时同时记录事件日志；profile 为 True 时在 cProfile 下运行（只分析本线程）
+        telemetry = RunTelemetry(events_path(file_path) if events_log else None)
         
-        if color_space == "RGB":
-            r_min, r_max, g_min, g_max, b_min, b_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((r_max - r_min + 1) // step) * ((g_max - g_min + 1) // step) * ((b_max - b_min + 1) // step)
-            current_count = 0
-            
-            for r in range(r_min, r_max + 1, step):
-                for g in range(g_min, g_max + 1, step):
-                    for b in range(b_min, b_max + 1, step):
-                        if not self.generating:
-                            return
-                        
-                        color_data.append({
-                            "color_space": "RGB",
-                            "R": r,
-                            "G": g,
-                            "B": b,
-                            "hex": f"#{r:02X}{g:02X}{b:02X}"
-                        })
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
-        
-        elif color_space == "HSL":
-            h_min, h_max, s_min, s_max, l_min, l_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((h_max - h_min + 1) // step) * ((s_max - s_min + 1) // step) * ((l_max - l_min + 1) // step)
-            current_count = 0
-            
-            for h in range(h_min, h_max + 1, step):
-                for s in range(s_min, s_max + 1, step):
-                    for l_val in range(l_min, l_max + 1, step):
-                        if not self.generating:
-                            return
-                        
-                        rgb = colorsys.hls_to_rgb(h/360, l_val/100, s/100)
-                        r, g, b = [round(x*255) for x in rgb]
-                        
-                        color_data.append({
-                            "color_space": "HSL",
-                            "H": h,
-                            "S": s,
-                            "L": l_val,
-                            "R": r,
-                            "G": g,
-                            "B": b,
-                            "hex": f"#{r:02X}{g:02X}{b:02X}"
-                        })
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
+        @throttle_progress
+        def on_progress(done, total):
+            self.progress_queue.put(("progress", (done / total) * 100, telemetry.snapshot()))
         
-        elif color_space == "CMYK":
-            c_min, c_max, m_min, m_max, y_min, y_max, k_min, k_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((c_max - c_min + 1) // step) * ((m_max - m_min + 1) // step) * ((y_max - y_min + 1) // step) * ((k_max - k_min + 1) // step)
-            current_count = 0
-            
-            for c in range(c_min, c_max + 1, step):
-                for m in range(m_min, m_max + 1, step):
-                    for y in range(y_min, y_max + 1, step):
-                        for k in range(k_min, k_max + 1, step):
-                            if not self.generating:
-                                return
-                            
-                            cmyk = CMYKColor(c/100, m/100, y/100, k/100)
-                            rgb = convert_color(cmyk, sRGBColor)
-                            r, g, b = [round(x*255) for x in rgb.get_value_tuple()]
-                            
-                            color_data.append({
-                                "color_space": "CMYK",
-                                "C": c,
-                                "M": m,
-                                "Y": y,
-                                "K": k,
-                                "R": r,
-                                "G": g,
-                                "B": b,
-                                "hex": f"#{r:02X}{g:02X}{b:02X}"
-                            })
-                            
-                            current_count += 1
-                            if current_count % 1000 == 0 or current_count == total_combinations:
-                                progress = (current_count / total_combinations) * 100
-                                self.update_progress(progress)
+        def run():
+            return WRITERS[output_format](
+                generator,
+                file_path,
+                on_progress=on_progress,
+                is_cancelled=self.cancel_event.is_set,
+                telemetry=telemetry,
+                **writer_options
+            )
         
-        elif color_space == "YUV":
-            y_min, y_max, u_min, u_max, v_min, v_max = args
-            step = 0.01  # YUV使用固定步长
-            
-            total_combinations = int((y_max - y_min) / step) * int((u_max - u_min) / step) * int((v_max - v_min) / step)
-            current_count = 0
-            
-            y_val = y_min
-            while y_val <= y_max:
-                u_val = u_min
-                while u_val <= u_max:
-                    v_val = v_min
-                    while v_val <= v_max:
-                        if not self.generating:
-                            return
-                        
-                        # 转换为RGB
-                        r = y_val + 1.4075 * (v_val - 0.5)
-                        g = y_val - 0.3455 * (u_val - 0.5) - 0.7169 * (v_val - 0.5)
-                        b = y_val + 1.7790 * (u_val - 0.5)
-                        
-                        r = max(0, min(1, r))
-                        g = max(0, min(1, g))
-                        b = max(0, min(1, b))
-                        
-                        r, g, b = [round(x*255) for x in (r, g, b)]
-                        
-                        color_data.append({
-                            "color_space": "YUV",
-                            "Y": round(y_val, 2),
-                            "U": round(u_val, 2),
-                            "V": round(v_val, 2),
-                            "R": r,
-                            "G": g,
-                            "B": b,
-                            "hex": f"#{r:02X}{g:02X}{b:02X}"
-                        })
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
-                        
-                        v_val += step
-                    u_val += step
-                y_val += step
+        completed, error = False, None
+        try:
+            if profile:
+                completed = run_profiled(run, file_path, profile_title(generator, output_format), trace_memory)
+            else:
+                completed = run()
+        except Exception as e:
+            error = str(e)
         
-        elif color_space == "Lab":
-            l_min, l_max, a_min, a_max, b_min, b_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((l_max - l_min + 1) // step) * ((a_max - a_min + 1) // step) * ((b_max - b_min + 1) // step)
-            current_count = 0
-            
-            for l_val in range(l_min, l_max + 1, step):
-                for a_val in range(a_min, a_max + 1, step):
-                    for b_val in range(b_min, b_max + 1, step):
-                        if not self.generating:
-                            return
-                        
-                        lab = LabColor(l_val, a_val, b_val)
-                        rgb = convert_color(lab, sRGBColor)
-                        r, g, b = [round(x*255) for x in rgb.get_value_tuple()]
-                        
-                        color_data.append({
-                            "color_space": "Lab",
-                            "L": l_val,
-                            "a": a_val,
-                            "b": b_val,
-                            "R": r,
-                            "G": g,
-                            "B": b,
-                            "hex": f"#{r:02X}{g:02X}{b:02X}"
-                        })
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
+        if error is not None:
+            run_stats = telemetry.finish("error", error)
+        else:
+            run_stats = telemetry.finish("completed" if completed else "cancelled")
+        try:
+            write_run_report(file_path, generator, output_format, run_stats)
+        except OSError:
+            # 报告写入失败不影响生成结果
+            pass
         
-        elif color_space == "HEX":
-            hex_start, hex_end = args
-            step = int(self.step.get())
-            
-            start_val = int(hex_start, 16)
-            end_val = int(hex_end, 16)
-            
-            if start_val > end_val:
-                start_val, end_val = end_val, start_val
-            
-            total_combinations = (end_val - start_val + 1) // step
-            current_count = 0
-            
-            for val in range(start_val, end_val + 1, step):
-                if not self.generating:
-                    return
-                
-                hex_str = f"{val:06X}"
-                r = int(hex_str[0:2], 16)
-                g = int(hex_str[2:4], 16)
-                b = int(hex_str[4:6], 16)
-                
-                color_data.append({
-                    "color_space": "HEX",
-                    "hex": hex_str,
-                    "R": r,
-                    "G": g,
-                    "B": b
-                })
-                
-                current_count += 1
-                if current_count % 1000 == 0 or current_count == total_combinations:
-                    progress = ((val - start_val) / (end_val - start_val)) * 100
-                    self.update_progress(progress)
-        
-        # 写入JSON文件
-        with open(file_path, 'w') as jsonfile:
-            json.dump({
-                "metadata": {
-                    "color_space": color_space,
-                    "generated_at": datetime.now().isoformat(),
-                    "total_colors": len(color_data)
-                },
-                "colors": color_data
-            }, jsonfile, indent=2)
-    
-    def generate_sqlite(self, file_path, color_space, *args):
-        conn = sqlite3.connect(file_path)
-        cursor = conn.cursor()
-        
-        # 创建表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS colors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            color_space TEXT,
-            r INTEGER,
-            g INTEGER,
-            b INTEGER,
-            hex TEXT,
-            h REAL,
-            s REAL,
-            l REAL,
-            c REAL,
-            m REAL,
-            y REAL,
-            k REAL,
-            y_val REAL,
-            u REAL,
-            v REAL,
-            l_val REAL,
-            a REAL,
-            b_val REAL,
-            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        if error is not None:
+            self.progress_queue.put(("error", error))
+            return
+        cache_stats = generator.cache.stats() if generator.cache is not None else None
+        unique_stats = generator.unique_stats() if generator.unique_rgb else None
+        gamut_stats = generator.gamut_stats() if generator.out_of_gamut != "keep" else None
+        profile_file = profile_summary_path(file_path) if profile else None
+        self.progress_queue.put(("done", completed, file_path, generator.total, None, cache_stats,
+                                 unique_stats, gamut_stats, run_stats, profile_file))
+
+
+# ===================== 命令行入口 =====================
+
+# 命令行中各通道对应的选项名
+CHANNEL_OPTIONS = {
+    "RGB": ["r", "g", "b"],
+    "HSL": ["h", "s", "l"],
+    "HSV": ["h", "s", "v"],
+    "CMYK": ["c", "m", "y", "k"],
+    "YUV": ["y", "u", "v"],
+    "Lab": ["l", "a", "b"],
+    "HEX": ["hex"],
+}
+RANGE_OPTIONS = sorted({name for names in CHANNEL_OPTIONS.values() for name in names})
+FORMAT_CHOICES = {"csv": "CSV", "json": "JSON", "ndjson": "NDJSON", "npy": "NPY", "sqlite": "SQLite"}
+FORMAT_EXTENSIONS = {".csv": "csv", ".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".npy": "npy",
+                     ".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite"}
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="Color_Space_Generator_App",
+        description="色彩空间生成器（不带参数运行时启动图形界面）"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    generate = subparsers.add_parser("generate", help="按指定范围生成颜色文件")
+    generate.add_argument("--space", required=True, choices=list(CHANNEL_OPTIONS),
+                          help="色彩空间")
+    for name in RANGE_OPTIONS:
+        generate.add_argument(f"--{name}", metavar="MIN:MAX",
+                              help=f"{name.upper()} 通道范围，省略时使用该通道的完整范围")
+    generate.add_argument("--step", type=float, help="步长（默认 1，YUV 默认 0.01）")
+    generate.add_argument("--format", choices=list(FORMAT_CHOICES),
+                          help="输出格式，省略时根据输出文件扩展名判断")
+    generate.add_argument("-o", "--output", required=True, help="输出文件路径")
+    generate.add_argument("--workers", type=int, default=1, help="并行进程数")
+    generate.add_argument("--extra-spaces", nargs="+", choices=list(EXTRA_SPACES), default=[],
+                          help="每行附加输出这些色彩空间的坐标（列名如 HSL_H、Lab_a）")
+    generate.add_argument("--all-spaces", action="store_true", help="附加输出所有其他色彩空间的坐标")
+    generate.add_argument("--unique-rgb", action="store_true",
+                          help="每种 RGB 颜色只输出第一次出现的行（用 2 MB 位图去重）")
+    generate.add_argument("--out-of-gamut", choices=list(OUT_OF_GAMUT_MODES), default="keep",
+                          help="Lab/YUV 中超出 sRGB 色域的点：keep 保留并截断到 0-255，drop 去掉，"
+                               f"flag 保留并在 {GAMUT_FIELD} 列中标记（1 为色域内）")
+    generate.add_argument("--cache-dir", nargs="?", const=LUT_CACHE_DIR,
+                          help=f"缓存 Lab/CMYK 转换结果的目录（只写选项名时使用 {LUT_CACHE_DIR}）")
+    generate.add_argument("--cache-size", type=int, default=LUT_CACHE_MAX_BYTES // (1024 * 1024),
+                          help="转换缓存的容量上限（MB）")
+    generate.add_argument("--sqlite-bulk", action="store_true",
+                          help="SQLite 批量导入模式（更快，但中途断电可能损坏数据库；不保存断点，不能与 --resume 同用）")
+    generate.add_argument("--sqlite-schema", choices=["wide", "compact"], default="wide",
+                          help="SQLite 表结构")
+    generate.add_argument("--sqlite-without-rowid", dest="sqlite_without_rowid", action="store_true", default=True,
+                          help="紧凑表使用 WITHOUT ROWID（默认）")
+    generate.add_argument("--sqlite-rowid", dest="sqlite_without_rowid", action="store_false",
+                          help="紧凑表保留 rowid")
+    generate.add_argument("--resume", action="store_true",
+                          help="从断点文件（<输出文件>.ckpt.json）记录的位置继续生成")
+    generate.add_argument("--no-checkpoint", action="store_true", help="不保存断点文件")
+    generate.add_argument("--no-report", action="store_true", help="不写运行报告（<输出文件>.report.json）")
+    generate.add_argument("--events", action="store_true",
+                          help="把每批的进度和各阶段耗时追加到事件日志（<输出文件>.events.jsonl）")
+    generate.add_argument("--profile", action="store_true",
+                          help="在 cProfile 下运行，保存 <输出文件>.prof 和按累计耗时排序的摘要 <输出文件>.prof.txt")
+    generate.add_argument("--trace-memory", action="store_true",
+                          help="性能分析时同时用 tracemalloc 统计内存分配（隐含 --profile，较慢）")
+    generate.add_argument("-q", "--quiet", action="store_true", help="不输出进度")
+    
+    subparsers.add_parser("startup", help="测量图形界面的启动耗时（界面首次空闲后自动退出）")
+    
+    reverse = subparsers.add_parser("reverse-tables", help="生成 RGB 立方体反查表（可中断，再次运行从断点继续）")
+    reverse.add_argument("-o", "--output", required=True, help="反查表目录")
+    reverse.add_argument("--spaces", nargs="+", choices=list(REVERSE_TABLE_SPACES),
+                         default=list(REVERSE_TABLE_SPACES), help="要生成的色彩空间")
+    reverse.add_argument("-q", "--quiet", action="store_true", help="不输出进度")
+    return parser
+
+
+def normalize_argv(argv):
+    # argparse 会把 "-128:127" 当成选项，这里改写成 --a=-128:127 的形式
+    result = []
+    options = {f"--{name}" for name in RANGE_OPTIONS}
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg in options and index + 1 < len(argv) and argv[index + 1].startswith("-"):
+            result.append(f"{arg}={argv[index + 1]}")
+            index += 2
+        else:
+            result.append(arg)
+            index += 1
+    return result
+
+
+def parse_range(text, color_space):
+    parts = text.split(":")
+    if len(parts) != 2:
+        raise ValueError(f"范围格式应为 MIN:MAX: {text}")
+    if color_space == "HEX":
+        return tuple(part.strip().upper().lstrip("#") for part in parts)
+    convert = float if color_space == "YUV" else int
+    try:
+        return convert(parts[0]), convert(parts[1])
+    except ValueError:
+        raise ValueError(f"无效的范围: {text}")
+
+
+def generator_from_args(args):
+    color_space = args.space
+    ranges = []
+    for name, limit in zip(CHANNEL_OPTIONS[color_space], CHANNEL_LIMITS[color_space]):
+        value = getattr(args, name)
+        ranges.append(parse_range(value, color_space) if value else limit)
+    
+    if args.step is None:
+        step = 0.01 if color_space == "YUV" else 1
+    elif color_space == "YUV":
+        step = args.step
+    elif args.step.is_integer():
+        step = int(args.step)
+    else:
+        raise ValueError("步长必须是整数")
+    validate_parameters(color_space, ranges, step)
+    
+    if args.workers < 1:
+        raise ValueError("并行进程数必须大于 0")
+    cache = None
+    if args.cache_dir and color_space in LUT_CACHE_SPACES:
+        cache = ConversionCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+    extra_spaces = EXTRA_SPACES if args.all_spaces else args.extra_spaces
+    return ColorSpaceGenerator(color_space, ranges, step, workers=args.workers, cache=cache,
+                               extra_spaces=extra_spaces, unique_rgb=args.unique_rgb,
+                               out_of_gamut=args.out_of_gamut)
+
+
+def output_format_from_args(args):
+    if args.format:
+        return FORMAT_CHOICES[args.format]
+    extension = os.path.splitext(args.output)[1].lower()
+    if extension not in FORMAT_EXTENSIONS:
+        raise ValueError(f"无法根据扩展名判断输出格式，请使用 --format 指定: {args.output}")
+    return FORMAT_CHOICES[FORMAT_EXTENSIONS[extension]]
+
+
+def run_generate(args):
+    writer_options = {"checkpoint": not args.no_checkpoint, "resume": args.resume}
+    try:
+        generator = generator_from_args(args)
+        output_format = output_format_from_args(args)
+        if output_format == "SQLite":
+            writer_options.update(bulk=args.sqlite_bulk, schema=args.sqlite_schema,
+                                  without_rowid=args.sqlite_without_rowid)
+            if args.sqlite_bulk:
+                if args.resume:
+                    raise ValueError("SQLite 批量导入模式不支持从断点继续生成")
+                writer_options["checkpoint"] = False
+        if args.resume:
+            options = sqlite_checkpoint_options(args.sqlite_schema, args.sqlite_without_rowid) if output_format == "SQLite" else {}
+            check_checkpoint(read_checkpoint(args.output), generator, output_format, **options)
+    except (ValueError, OSError) as e:
+        print(f"输入错误: {e}", file=sys.stderr)
+        return 2
+    
+    line_width = 0
+    telemetry = RunTelemetry(events_path(args.output) if args.events else None)
+    
+    @throttle_progress
+    def on_progress(done, total):
+        nonlocal line_width
+        line = f"生成中: {done}/{total} ({done / total * 100:.1f}%) {progress_text(telemetry.snapshot())}"
+        # 补足空格，覆盖上一行较长的残留内容
+        line_width = max(line_width, len(line))
+        sys.stderr.write("\r" + line.ljust(line_width))
+        sys.stderr.flush()
+    
+    def save_report(status, error=None):
+        stats = telemetry.finish(status, error)
+        if not args.no_report:
+            try:
+                write_run_report(args.output, generator, output_format, stats)
+            except OSError as e:
+                print(f"无法写入运行报告: {e}", file=sys.stderr)
+        return stats
+    
+    def run():
+        return WRITERS[output_format](
+            generator,
+            args.output,
+            on_progress=None if args.quiet else on_progress,
+            telemetry=telemetry,
+            **writer_options
         )
-        ''')
-        
-        if color_space == "RGB":
-            r_min, r_max, g_min, g_max, b_min, b_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((r_max - r_min + 1) // step) * ((g_max - g_min + 1) // step) * ((b_max - b_min + 1) // step)
-            current_count = 0
-            
-            for r in range(r_min, r_max + 1, step):
-                for g in range(g_min, g_max + 1, step):
-                    for b in range(b_min, b_max + 1, step):
-                        if not self.generating:
-                            conn.close()
-                            return
-                        
-                        cursor.execute('''
-                        INSERT INTO colors (color_space, r, g, b, hex)
-                        VALUES (?, ?, ?, ?, ?)
-                        ''', (
-                            "RGB",
-                            r,
-                            g,
-                            b,
-                            f"#{r:02X}{g:02X}{b:02X}"
-                        ))
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
-                            conn.commit()
-        
-        elif color_space == "HSL":
-            h_min, h_max, s_min, s_max, l_min, l_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((h_max - h_min + 1) // step) * ((s_max - s_min + 1) // step) * ((l_max - l_min + 1) // step)
-            current_count = 0
-            
-            for h in range(h_min, h_max + 1, step):
-                for s in range(s_min, s_max + 1, step):
-                    for l_val in range(l_min, l_max + 1, step):
-                        if not self.generating:
-                            conn.close()
-                            return
-                        
-                        rgb = colorsys.hls_to_rgb(h/360, l_val/100, s/100)
-                        r, g, b = [round(x*255) for x in rgb]
-                        
-                        cursor.execute('''
-                        INSERT INTO colors (color_space, h, s, l, r, g, b, hex)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            "HSL",
-                            h,
-                            s,
-                            l_val,
-                            r,
-                            g,
-                            b,
-                            f"#{r:02X}{g:02X}{b:02X}"
-                        ))
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
-                            conn.commit()
-        
-        elif color_space == "CMYK":
-            c_min, c_max, m_min, m_max, y_min, y_max, k_min, k_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((c_max - c_min + 1) // step) * ((m_max - m_min + 1) // step) * ((y_max - y_min + 1) // step) * ((k_max - k_min + 1) // step)
-            current_count = 0
-            
-            for c in range(c_min, c_max + 1, step):
-                for m in range(m_min, m_max + 1, step):
-                    for y in range(y_min, y_max + 1, step):
-                        for k in range(k_min, k_max + 1, step):
-                            if not self.generating:
-                                conn.close()
-                                return
-                            
-                            cmyk = CMYKColor(c/100, m/100, y/100, k/100)
-                            rgb = convert_color(cmyk, sRGBColor)
-                            r, g, b = [round(x*255) for x in rgb.get_value_tuple()]
-                            
-                            cursor.execute('''
-                            INSERT INTO colors (color_space, c, m, y, k, r, g, b, hex)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                "CMYK",
-                                c,
-                                m,
-                                y,
-                                k,
-                                r,
-                                g,
-                                b,
-                                f"#{r:02X}{g:02X}{b:02X}"
-                            ))
-                            
-                            current_count += 1
-                            if current_count % 1000 == 0 or current_count == total_combinations:
-                                progress = (current_count / total_combinations) * 100
-                                self.update_progress(progress)
-                                conn.commit()
-        
-        elif color_space == "YUV":
-            y_min, y_max, u_min, u_max, v_min, v_max = args
-            step = 0.01  # YUV使用固定步长
-            
-            total_combinations = int((y_max - y_min) / step) * int((u_max - u_min) / step) * int((v_max - v_min) / step)
-            current_count = 0
-            
-            y_val = y_min
-            while y_val <= y_max:
-                u_val = u_min
-                while u_val <= u_max:
-                    v_val = v_min
-                    while v_val <= v_max:
-                        if not self.generating:
-                            conn.close()
-                            return
-                        
-                        # 转换为RGB
-                        r = y_val + 1.4075 * (v_val - 0.5)
-                        g = y_val - 0.3455 * (u_val - 0.5) - 0.7169 * (v_val - 0.5)
-                        b = y_val + 1.7790 * (u_val - 0.5)
-                        
-                        r = max(0, min(1, r))
-                        g = max(0, min(1, g))
-                        b = max(0, min(1, b))
-                        
-                        r, g, b = [round(x*255) for x in (r, g, b)]
-                        
-                        cursor.execute('''
-                        INSERT INTO colors (color_space, y_val, u, v, r, g, b, hex)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            "YUV",
-                            round(y_val, 2),
-                            round(u_val, 2),
-                            round(v_val, 2),
-                            r,
-                            g,
-                            b,
-                            f"#{r:02X}{g:02X}{b:02X}"
-                        ))
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
-                            conn.commit()
-                        
-                        v_val += step
-                    u_val += step
-                y_val += step
-        
-        elif color_space == "Lab":
-            l_min, l_max, a_min, a_max, b_min, b_max = args
-            step = int(self.step.get())
-            
-            total_combinations = ((l_max - l_min + 1) // step) * ((a_max - a_min + 1) // step) * ((b_max - b_min + 1) // step)
-            current_count = 0
-            
-            for l_val in range(l_min, l_max + 1, step):
-                for a_val in range(a_min, a_max + 1, step):
-                    for b_val in range(b_min, b_max + 1, step):
-                        if not self.generating:
-                            conn.close()
-                            return
-                        
-                        lab = LabColor(l_val, a_val, b_val)
-                        rgb = convert_color(lab, sRGBColor)
-                        r, g, b = [round(x*255) for x in rgb.get_value_tuple()]
-                        
-                        cursor.execute('''
-                        INSERT INTO colors (color_space, l_val, a, b_val, r, g, b, hex)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            "Lab",
-                            l_val,
-                            a_val,
-                            b_val,
-                            r,
-                            g,
-                            b,
-                            f"#{r:02X}{g:02X}{b:02X}"
-                        ))
-                        
-                        current_count += 1
-                        if current_count % 1000 == 0 or current_count == total_combinations:
-                            progress = (current_count / total_combinations) * 100
-                            self.update_progress(progress)
-                            conn.commit()
-        
-        elif color_space == "HEX":
-            hex_start, hex_end = args
-            step = int(self.step.get())
-            
-            start_val = int(hex_start, 16)
-            end_val = int(hex_end, 16)
-            
-            if start_val > end_val:
-                start_val, end_val = end_val, start_val
-            
-            total_combinations = (end_val - start_val + 1) // step
-            current_count = 0
-            
-            for val in range(start_val, end_val + 1, step):
-                if not self.generating:
-                    conn.close()
-                    return
-                
-                hex_str = f"{val:06X}"
-                r = int(hex_str[0:2], 16)
-                g = int(hex_str[2:4], 16)
-                b = int(hex_str[4:6], 16)
-                
-                cursor.execute('''
-                INSERT INTO colors (color_space, hex, r, g, b)
-                VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    "HEX",
-                    hex_str,
-                    r,
-                    g,
-                    b
-                ))
-                
-                current_count += 1
-                if current_count % 1000 == 0 or current_count == total_combinations:
-                    progress = ((val - start_val) / (end_val - start_val)) * 100
-                    self.update_progress(progress)
-                    conn.commit()
-        
-        conn.commit()
-        conn.close()
+    
+    profile = args.profile or args.trace_memory
+    try:
+        if profile:
+            run_profiled(run, args.output, profile_title(generator, output_format), args.trace_memory)
+        else:
+            run()
+    except KeyboardInterrupt:
+        save_report("interrupted")
+        if not args.quiet:
+            sys.stderr.write("\n")
+        if writer_options["checkpoint"]:
+            print("已中断，可使用 --resume 从断点继续", file=sys.stderr)
+        else:
+            print("已中断，输出文件不完整", file=sys.stderr)
+        return 130
+    except Exception as e:
+        save_report("error", str(e))
+        if not args.quiet:
+            sys.stderr.write("\n")
+        print(f"生成文件时出错: {e}", file=sys.stderr)
+        return 1
+    
+    run_stats = save_report("completed")
+    if not args.quiet:
+        # 耗时和速度只计本次运行（断点续写时不含之前写入的行）
+        sys.stderr.write("\n")
+        print(f"已生成 {args.output}：{rows_text(run_stats, generator.total)}，"
+              f"耗时 {run_stats['elapsed']:.2f} 秒，{run_stats['rows_per_sec']:,.0f} 行/秒", file=sys.stderr)
+        print(f"写入 {format_bytes(run_stats['bytes'])}（{format_bytes(run_stats['bytes_per_sec'])}/秒），"
+              f"各阶段耗时：{stages_text(run_stats)}", file=sys.stderr)
+        if profile:
+            print(f"性能分析：{profile_path(args.output)}，摘要 {profile_summary_path(args.output)}", file=sys.stderr)
+        if generator.cache is not None:
+            stats = generator.cache.stats()
+            print(f"转换缓存：命中 {stats['hits']} 块，未命中 {stats['misses']} 块"
+                  f"（命中率 {stats['hit_rate']:.0%}）", file=sys.stderr)
+        if generator.out_of_gamut != "keep":
+            stats = generator.gamut_stats()
+            action = "去掉" if stats["mode"] == "drop" else "标记"
+            print(f"超出 sRGB 色域：{action} {stats['out_of_gamut']} 个点"
+                  f"（占 {stats['out_of_gamut_rate']:.1%}）", file=sys.stderr)
+        if generator.unique_rgb:
+            stats = generator.unique_stats()
+            print(f"去重：输出 {stats['unique']} 种不同的 RGB 颜色，跳过重复 {stats['duplicates']} 条"
+                  f"（重复率 {stats['duplicate_rate']:.1%}）", file=sys.stderr)
+    return 0
 
-if __name__ == "__main__":
+
+def run_reverse_tables(args):
+    @throttle_progress
+    def on_progress(done, total):
+        sys.stderr.write(f"\r生成反查表: {done}/{total} ({done / total * 100:.1f}%)")
+        sys.stderr.flush()
+    
+    start_time = time.perf_counter()
+    try:
+        build_reverse_tables(args.output, args.spaces, on_progress=None if args.quiet else on_progress)
+    except KeyboardInterrupt:
+        if not args.quiet:
+            sys.stderr.write("\n")
+        print("已中断，再次运行同一命令可从断点继续", file=sys.stderr)
+        return 130
+    except (ValueError, OSError) as e:
+        if not args.quiet:
+            sys.stderr.write("\n")
+        print(f"生成反查表时出错: {e}", file=sys.stderr)
+        return 1
+    
+    if not args.quiet:
+        sys.stderr.write("\n")
+        print(f"反查表已保存到 {args.output}（耗时 {time.perf_counter() - start_time:.1f} 秒）", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    args = build_arg_parser().parse_args(normalize_argv(argv))
+    if args.command == "generate":
+        return run_generate(args)
+    if args.command == "startup":
+        return measure_startup()
+    if args.command == "reverse-tables":
+        return run_reverse_tables(args)
+    return 2
+
+
+def measure_startup():
+    # 创建主窗口并在第一次空闲（界面已绘制）时输出各阶段耗时，然后退出
+    if tk is None:
+        print("未找到 tkinter，无法启动图形界面", file=sys.stderr)
+        return 1
+    imported = time.perf_counter()
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"无法创建窗口: {e}", file=sys.stderr)
+        return 1
+    app = ColorSpaceGeneratorApp(root)
+    created = time.perf_counter()
+    
+    def report():
+        shown = time.perf_counter()
+        print(f"模块导入: {(imported - IMPORT_STARTED) * 1000:.1f} ms")
+        print(f"创建界面: {(created - imported) * 1000:.1f} ms")
+        print(f"首次绘制: {(shown - created) * 1000:.1f} ms")
+        print(f"合计: {(shown - IMPORT_STARTED) * 1000:.1f} ms")
+        loaded = [name for name in ("numpy", "colormath") if name in sys.modules]
+        print(f"已加载的数值库: {', '.join(loaded) if loaded else '无'}")
+        root.destroy()
+    
+    root.update()
+    root.after_idle(report)
+    root.mainloop()
+    return 0
+
+
+def run_gui():
+    if tk is None:
+        print("未找到 tkinter，无法启动图形界面；请使用 generate 子命令", file=sys.stderr)
+        return 1
     root = tk.Tk()
     app = ColorSpaceGeneratorApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    sys.exit(run_gui())
\ No newline at end of file
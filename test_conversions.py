@@ -0,0 +1,52 @@
+import colorsys
+import itertools
+
+import numpy as np
+from colormath import color_conversions, color_objects
+
+import Color_Space_Generator_App as app
+
+
+def colormath_rgb(color_class, points):
+    # 逐点调用 colormath，返回未截断、未取整的 sRGB 值（0-1），形状为 3 × 点数
+    return np.array([
+        color_conversions.convert_color(color_class(*point), color_objects.sRGBColor).get_value_tuple()
+        for point in points
+    ]).T
+
+
+def grid_points(*axes):
+    points = list(itertools.product(*axes))
+    return points, tuple(np.array(channel, dtype=np.float64) for channel in zip(*points))
+
+
+def test_hsl_hsv_kernel_matches_colorsys():
+    # 完整的 361 × 101 × 101 整数网格，四舍五入后必须与逐点调用 colorsys 完全相同
+    s, x = np.meshgrid(np.arange(101), np.arange(101), indexing="ij")
+    s, x = s.ravel(), x.ravel()
+    pairs = list(zip(s.tolist(), x.tolist()))
+    for h in range(361):
+        hue = np.full(len(s), h)
+        expected = np.array([
+            [round(c * 255) for c in colorsys.hls_to_rgb(h / 360, xi / 100, si / 100)] for si, xi in pairs
+        ]).T
+        np.testing.assert_array_equal(np.stack(app.hsl_hsv_to_rgb("HSL", hue, s, x)), expected)
+        expected = np.array([
+            [round(c * 255) for c in colorsys.hsv_to_rgb(h / 360, si / 100, xi / 100)] for si, xi in pairs
+        ]).T
+        np.testing.assert_array_equal(np.stack(app.hsl_hsv_to_rgb("HSV", hue, s, x)), expected)
+
+
+def test_lab_kernel_matches_colormath():
+    # 采样网格覆盖 L 的两端和色域外的 a/b
+    points, channels = grid_points(range(0, 101, 10), range(-128, 128, 16), range(-128, 128, 16))
+    expected = colormath_rgb(color_objects.LabColor, points)
+    np.testing.assert_allclose(np.stack(app.lab_to_rgb_array(*channels)), expected, rtol=0, atol=1e-9)
+
+
+def test_cmyk_kernel_matches_colormath():
+    # CMYK 各通道为 0-1
+    axis = [i / 10 for i in range(11)]
+    points, channels = grid_points(axis, axis, axis, axis)
+    expected = colormath_rgb(color_objects.CMYKColor, points)
+    np.testing.assert_allclose(np.stack(app.cmyk_to_rgb_array(*channels)), expected, rtol=0, atol=1e-9)